@@ -0,0 +1,285 @@
+from BinarySearchTreeNode import BinarySearchTreeNode
+
+
+class AVLNode(BinarySearchTreeNode):
+    __slots__ = ('height',)  # nodes on the longest path down to a leaf, 1 for a leaf
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.height = 1
+
+
+def _height(node):
+    return node.height if node is not None else 0
+
+
+def _update_height(node):
+    node.height = 1 + max(_height(node.left), _height(node.right))
+
+
+def _rotate_right(node):
+    """
+        node            pivot
+        /   \\           /   \\
+     pivot   c   ->    a    node
+     /   \\                  /   \\
+    a     b                b     c
+    """
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = node
+    _update_height(node)
+    _update_height(pivot)
+    return pivot
+
+
+def _rotate_left(node):
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = node
+    _update_height(node)
+    _update_height(pivot)
+    return pivot
+
+
+def _rebalance(node):
+    """
+    Restore the AVL rule (child heights differ by at most 1) at node, whose subtrees are already balanced.
+    :return: the new root of this subtree
+    """
+    _update_height(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)  # left-right case
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)  # right-left case
+        return _rotate_left(node)
+    return node
+
+
+class BinarySearchTree:
+    """
+    A set of keys kept in BinarySearchTreeNode nodes, so every DFS method works on tree.root.
+    Insert, search and delete walk down with a loop and remember the path in a list, so nothing recurses and a
+    degenerate tree is slow but never crashes. With balanced=True the nodes are AVLNodes and every insert / delete
+    rebalances the nodes on its path, which keeps the height (and every lookup) O(log n) even for sorted input.
+    """
+
+    __slots__ = ('root', 'size', 'balanced')
+
+    def __init__(self, balanced=False):
+        self.root = None
+        self.size = 0
+        self.balanced = balanced
+
+    @classmethod
+    def from_sorted(cls, keys, balanced=False):
+        """
+        Build a tree of minimal height from strictly increasing keys in O(n): the middle key becomes the root and each
+        half is built the same way, using an explicit stack of index ranges.
+        :param keys: sequence of strictly increasing keys
+        :param balanced: keep the tree balanced on later inserts / deletes
+        :return:
+        """
+        for i in range(1, len(keys)):
+            if not keys[i - 1] < keys[i]:
+                raise ValueError(f"keys must be strictly increasing, got {keys[i - 1]!r} before {keys[i]!r}")
+        tree = cls(balanced)
+        if not keys:
+            return tree
+        node_class = AVLNode if balanced else BinarySearchTreeNode
+        low, high = 0, len(keys) - 1
+        tree.root = node_class(keys[(low + high) // 2])
+        tree.size = len(keys)
+        stack = [(tree.root, low, high)]
+        while stack:
+            node, low, high = stack.pop()
+            middle = (low + high) // 2
+            if balanced:
+                node.height = (high - low + 1).bit_length()  # height of a midpoint-built subtree of that many keys
+            if low < middle:
+                child = node_class(keys[(low + middle - 1) // 2])
+                node.left = child
+                stack.append((child, low, middle - 1))
+            if middle < high:
+                child = node_class(keys[(middle + 1 + high) // 2])
+                node.right = child
+                stack.append((child, middle + 1, high))
+        return tree
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return self.search(key) is not None
+
+    def __iter__(self):
+        return self.range()
+
+    def search(self, key):
+        """:return: the node holding key, or None"""
+        node = self.root
+        while node is not None:
+            if key < node.value:
+                node = node.left
+            elif key > node.value:
+                node = node.right
+            else:
+                return node
+        return None
+
+    def _replace_child(self, parent, old, new):
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def _rebalance_path(self, path):
+        """
+        Rebalance the nodes on path from the bottom up, re-linking rotated subtrees into their parents.
+        Once a node keeps its height and needs no rotation nothing above it can change, so we stop there.
+        """
+        for i in reversed(range(len(path))):
+            node = path[i]
+            old_height = node.height
+            new_root = _rebalance(node)
+            if new_root is not node:
+                self._replace_child(path[i - 1] if i else None, node, new_root)
+            elif node.height == old_height:
+                break
+
+    def insert(self, key):
+        """
+        :return: True if key was added, False if it was already present
+        """
+        new_node = AVLNode(key) if self.balanced else BinarySearchTreeNode(key)
+        if self.root is None:
+            self.root = new_node
+            self.size = 1
+            return True
+        path = []
+        node = self.root
+        while True:
+            path.append(node)
+            if key < node.value:
+                if node.left is None:
+                    node.left = new_node
+                    break
+                node = node.left
+            elif key > node.value:
+                if node.right is None:
+                    node.right = new_node
+                    break
+                node = node.right
+            else:
+                return False
+        self.size += 1
+        if self.balanced:
+            self._rebalance_path(path)
+        return True
+
+    def delete(self, key):
+        """
+        :return: True if key was removed, False if it was not present
+        """
+        path = []
+        node = self.root
+        while node is not None and node.value != key:
+            path.append(node)
+            node = node.left if key < node.value else node.right
+        if node is None:
+            return False
+
+        if node.left is not None and node.right is not None:
+            # Two children: move the in-order successor's key here and remove the successor instead,
+            # it is the leftmost node of the right subtree so it has no left child.
+            path.append(node)
+            successor = node.right
+            while successor.left is not None:
+                path.append(successor)
+                successor = successor.left
+            node.value = successor.value
+            node = successor
+
+        child = node.left if node.left is not None else node.right
+        self._replace_child(path[-1] if path else None, node, child)
+        self.size -= 1
+        if self.balanced:
+            self._rebalance_path(path)
+        return True
+
+    def range(self, low=None, high=None):
+        """
+        Yield the keys k with low <= k <= high in increasing order (None means unbounded).
+        The in-order walk skips every left subtree whose keys are all below low and stops at the first key above high,
+        so it costs O(height + number of keys yielded).
+        """
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                if low is not None and node.value < low:
+                    node = node.right  # node and its whole left subtree are below the range
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if high is not None and node.value > high:
+                return
+            yield node.value
+            node = node.right
+
+    def height(self):
+        """Number of nodes on the longest root-to-leaf path."""
+        if self.balanced:
+            return _height(self.root)
+        height = 0
+        stack = [(self.root, 1)] if self.root is not None else []
+        while stack:
+            node, depth = stack.pop()
+            height = max(height, depth)
+            stack.extend((child, depth + 1) for child in (node.left, node.right) if child is not None)
+        return height
+
+
+if __name__ == "__main__":
+    import random
+
+    for balanced in (False, True):
+        tree = BinarySearchTree(balanced)
+        keys = set()
+        rng = random.Random(1)
+        for _ in range(3000):
+            key = rng.randrange(500)
+            if rng.random() < 0.6:
+                assert tree.insert(key) == (key not in keys)
+                keys.add(key)
+            else:
+                assert tree.delete(key) == (key in keys)
+                keys.discard(key)
+        assert list(tree) == sorted(keys) and len(tree) == len(keys)
+        assert list(tree.range(100, 200)) == [k for k in sorted(keys) if 100 <= k <= 200]
+        assert all(key in tree for key in keys) and 500 not in tree
+
+    # Sorted inserts make a chain without balancing, and an O(log n) tree with it
+    plain, avl = BinarySearchTree(), BinarySearchTree(balanced=True)
+    for key in range(1000):
+        plain.insert(key)
+        avl.insert(key)
+    assert plain.height() == 1000, f"Expected a 1000-node chain, but got height {plain.height()}"
+    assert avl.height() <= 11, f"Expected AVL height <= 11, but got {avl.height()}"
+
+    tree = BinarySearchTree.from_sorted(list(range(0, 2000, 2)), balanced=True)
+    assert tree.height() == 10 and list(tree.range(11, 19)) == [12, 14, 16, 18]
+    assert tree.delete(12) and tree.insert(13) and list(tree.range(11, 19)) == [13, 14, 16, 18]
+
+    from dfs import DFS
+    assert DFS().recursive_binary_search_tree(tree.root)
+    assert DFS().recursive_sum_of_nodes(tree.root) == sum(range(0, 2000, 2)) - 12 + 13
@@ -1,17 +1,40 @@
 from Node import Node
 class BinarySearchTreeNode(Node):
+    __slots__ = ('left', 'right')
+
     def __init__(self, value):
-        super().__init__(value)
+        self.value = value
         self.left = None
         self.right = None
-        self.neighbors = [self.left, self.right]
         self.visited = False
 
+    @property
+    def neighbors(self):
+        """
+        The children as (left, right), empty slots included, so the neighbor-based DFS methods see both slots.
+        Built from the two links on every read instead of stored as a second list that has to be kept in sync, which
+        saves the list (about 70 bytes) per node and means assigning node.left / node.right is all it takes.
+        Read-only here: children are added with add_child / add_left / add_right, never through the neighbor list.
+        """
+        return self.left, self.right
+
+    def add_neighbor(self, neighbor):
+        """Not supported: a BST node's place for a child depends on its value, use add_child."""
+        raise TypeError(f"{self!r} has no neighbor list, use add_child instead")
+
+    def add_neighbors(self, neighbors):
+        """Not supported, see add_neighbor."""
+        raise TypeError(f"{self!r} has no neighbor list, use add_child instead")
+
+    @classmethod
+    def from_edges(cls, edges, directed=True):
+        """Not supported: the edges would bypass the BST ordering, insert the values with add_child instead."""
+        raise TypeError(f"{cls.__name__} cannot be built from edges, use add_child instead")
+
     def add_left(self, node):
         """Add a left child node if value is less than current node."""
         if node.value < self.value:
             self.left = node
-            self.neighbors[0] = node
             return True
         return False
 
@@ -19,7 +42,6 @@ class BinarySearchTreeNode(Node):
         """Add a right child node if value is greater than current node."""
         if node.value > self.value:
             self.right = node
-            self.neighbors[1] = node
             return True
         return False
 
@@ -29,4 +51,19 @@ class BinarySearchTreeNode(Node):
             return self.add_left(node)
         elif node.value > self.value:
             return self.add_right(node)
-        return False
\ No newline at end of file
+        return False
+
+
+if __name__ == "__main__":
+    root = BinarySearchTreeNode(2)
+    assert root.add_child(BinarySearchTreeNode(1)) and root.add_child(BinarySearchTreeNode(3))
+    assert [child.value for child in root.neighbors] == [1, 3]
+    for attempt in (lambda: root.add_neighbor(BinarySearchTreeNode(4)),
+                    lambda: root.add_neighbors([BinarySearchTreeNode(4)]),
+                    lambda: BinarySearchTreeNode.from_edges([(2, 4)])):
+        try:
+            attempt()
+            assert False, "Expected TypeError when adding neighbors to a BST node"
+        except TypeError:
+            pass
+    assert root.right.value == 3 and root.right.right is None
@@ -0,0 +1,158 @@
+from BinarySearchTreeNode import BinarySearchTreeNode
+
+
+class CachedBinarySearchTreeNode(BinarySearchTreeNode):
+    """
+    A BinarySearchTreeNode that keeps aggregates of its own subtree up to date:
+    size, subtree_sum, subtree_max, height (edges down to the deepest leaf) and subtree_tilt (sum of all tilts below).
+    Every node also remembers its parent, so add_left / add_right / add_child only recompute the nodes on the path from
+    the change up to the root, O(height), and reading an aggregate is O(1).
+    Only changes made through those methods are tracked; assigning node.left / node.right directly bypasses the cache.
+    """
+
+    __slots__ = ('parent', 'size', 'subtree_sum', 'subtree_max', 'height', 'subtree_tilt')
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.parent = None
+        self._refresh()
+
+    @classmethod
+    def from_node(cls, root):
+        """
+        Copy a BinarySearchTreeNode tree (following left / right) into cached nodes.
+        :return: the new root, or None for an empty tree
+        """
+        if root is None:
+            return None
+        new_root = cls(root.value)
+        order = []
+        stack = [(root, new_root)]
+        while stack:
+            node, copy = stack.pop()
+            order.append(copy)
+            for child, slot in ((node.left, 0), (node.right, 1)):
+                if child is not None:
+                    child_copy = cls(child.value)
+                    child_copy.parent = copy
+                    if slot == 0:
+                        copy.left = child_copy
+                    else:
+                        copy.right = child_copy
+                    stack.append((child, child_copy))
+        for copy in reversed(order):  # children before parents
+            copy._refresh()
+        return new_root
+
+    def _refresh(self):
+        """Recompute this node's aggregates from its children's (which must already be correct)."""
+        left, right = self.left, self.right
+        left_sum = left.subtree_sum if left is not None else 0
+        right_sum = right.subtree_sum if right is not None else 0
+        self.size = 1 + (left.size if left is not None else 0) + (right.size if right is not None else 0)
+        self.subtree_sum = self.value + left_sum + right_sum
+        self.subtree_max = max(self.value,
+                               left.subtree_max if left is not None else self.value,
+                               right.subtree_max if right is not None else self.value)
+        self.height = max(1 + left.height if left is not None else 0,
+                          1 + right.height if right is not None else 0)
+        self.subtree_tilt = (abs(left_sum - right_sum)
+                             + (left.subtree_tilt if left is not None else 0)
+                             + (right.subtree_tilt if right is not None else 0))
+
+    def _refresh_to_root(self):
+        node = self
+        while node is not None:
+            node._refresh()
+            node = node.parent
+
+    def _attach(self, attach, node, previous):
+        if not isinstance(node, CachedBinarySearchTreeNode):
+            raise TypeError(f"{node!r} is not a CachedBinarySearchTreeNode")
+        if node.parent is not None:
+            raise ValueError(f"{node!r} is already attached to {node.parent!r}")
+        ancestor = self
+        while ancestor is not None:  # the refresh below would never end on a cycle
+            if ancestor is node:
+                raise ValueError(f"{node!r} is an ancestor of {self!r}, attaching it would make a cycle")
+            ancestor = ancestor.parent
+        if not attach(node):
+            return False
+        if previous is not None and previous is not node:
+            previous.parent = None
+        node.parent = self
+        self._refresh_to_root()
+        return True
+
+    def add_left(self, node):
+        return self._attach(super().add_left, node, self.left)
+
+    def add_right(self, node):
+        return self._attach(super().add_right, node, self.right)
+
+    def verify_cache(self):
+        """
+        Recompute every aggregate of this subtree from scratch and compare with the cached values.
+        :return: True if all cached values are correct
+        """
+        fresh = {}  # id(node) -> (size, sum, max, height, tilt)
+        order = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(child for child in (node.left, node.right) if child is not None)
+        for node in reversed(order):
+            left = fresh.get(id(node.left), (0, 0, node.value, -1, 0))
+            right = fresh.get(id(node.right), (0, 0, node.value, -1, 0))
+            fresh[id(node)] = (1 + left[0] + right[0],
+                               node.value + left[1] + right[1],
+                               max(node.value, left[2], right[2]),
+                               1 + max(left[3], right[3]),
+                               abs(left[1] - right[1]) + left[4] + right[4])
+            if fresh[id(node)] != (node.size, node.subtree_sum, node.subtree_max, node.height, node.subtree_tilt):
+                return False
+        return True
+
+
+if __name__ == "__main__":
+    #     4
+    #    / \
+    #   2   6
+    #  / \
+    # 1   3
+    root = CachedBinarySearchTreeNode(4)
+    two = CachedBinarySearchTreeNode(2)
+    assert root.add_child(two) and root.add_child(CachedBinarySearchTreeNode(6))
+    assert two.add_child(CachedBinarySearchTreeNode(1)) and two.add_child(CachedBinarySearchTreeNode(3))
+    assert (root.size, root.subtree_sum, root.subtree_max, root.height, root.subtree_tilt) == (5, 16, 6, 2, 2), \
+        f"Expected (5, 16, 6, 2, 2), but got {(root.size, root.subtree_sum, root.subtree_max, root.height, root.subtree_tilt)}"
+    assert root.verify_cache()
+
+    # Only the path from the change up to the root is recomputed
+    assert root.right.add_child(CachedBinarySearchTreeNode(5))
+    assert (root.subtree_sum, root.height, root.subtree_tilt) == (21, 2, 5 + 2 + 5)
+    assert not root.add_child(CachedBinarySearchTreeNode(4))
+    assert root.verify_cache()
+
+    # Replacing a child detaches the old subtree
+    assert root.add_left(CachedBinarySearchTreeNode(0))
+    assert two.parent is None and root.subtree_sum == 15 and root.verify_cache()
+
+    two.left.value = 100  # bypasses the cache
+    assert not two.verify_cache()
+
+    # A node cannot be attached below itself
+    r = CachedBinarySearchTreeNode(4)
+    t = CachedBinarySearchTreeNode(2)
+    assert r.add_child(t)
+    for node in (r, t):
+        try:
+            t.add_right(node)
+            assert False, "Expected ValueError when attaching an ancestor"
+        except ValueError:
+            pass
+    assert r.parent is None and t.right is None and r.verify_cache()
+
+    copy = CachedBinarySearchTreeNode.from_node(two)
+    assert copy.verify_cache() and copy.subtree_sum == 105
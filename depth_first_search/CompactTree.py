@@ -0,0 +1,396 @@
+from array import array
+
+from Node import Node
+from BinarySearchTreeNode import BinarySearchTreeNode
+
+NO_CHILD = -1
+
+
+def _index_array(size):
+    """Signed index array wide enough for `size` positions ('i' is 4 bytes, 'q' is 8)."""
+    return array('i' if size < 2 ** 31 else 'q')
+
+
+def _value_store(values):
+    """Pack node values into an array when they are all ints or all floats, otherwise keep a plain list."""
+    if values and all(type(value) is int for value in values):
+        try:
+            return array('q', values)
+        except OverflowError:
+            return values
+    if values and all(type(value) is float for value in values):
+        return array('d', values)
+    return values
+
+
+class CompactTree:
+    """
+    A tree stored as parallel arrays instead of one Python object per node (CSR, compressed sparse row).
+    Nodes are numbered 0..n-1 in pre-order, so the root is 0 and every child has a larger index than its parent:
+    - values[i] is the value of node i
+    - the children of node i are children[offsets[i]:offsets[i + 1]]
+    - for trees built from BinarySearchTreeNode, left[i] / right[i] hold the child index or NO_CHILD (-1)
+    Because of the pre-order numbering, walking the indices forwards is a depth-first traversal and walking them
+    backwards visits every child before its parent, so most DFS questions become a single loop over the arrays.
+    The arrays only need indexing, slicing and len(), so TreeFile can pass in memoryviews of a memory-mapped file.
+    """
+
+    __slots__ = ('values', 'offsets', 'children', 'left', 'right')
+
+    def __init__(self, values, offsets, children, left=None, right=None):
+        self.values = values
+        self.offsets = offsets
+        self.children = children
+        self.left = left
+        self.right = right
+
+    @classmethod
+    def from_node(cls, root):
+        """
+        Build a CompactTree from a Node tree (children taken from neighbors) or a BinarySearchTreeNode tree
+        (children taken from left / right). Raises ValueError if a node is reachable twice, because that is a graph
+        and not a tree.
+        :param root:
+        :return:
+        """
+        binary = isinstance(root, BinarySearchTreeNode)
+        values = []
+        parents = []
+        slots = []  # 0 for a left child, 1 for a right child, None for a neighbor
+        seen = set()
+        stack = [(root, NO_CHILD, None)] if root is not None else []
+        while stack:
+            node, parent, slot = stack.pop()
+            if id(node) in seen:
+                raise ValueError(f"{node!r} is reachable more than once, not a tree")
+            seen.add(id(node))
+            parents.append(parent)
+            slots.append(slot)
+            index = len(values)
+            values.append(node.value)
+            if binary:
+                if node.right is not None:
+                    stack.append((node.right, index, 1))
+                if node.left is not None:
+                    stack.append((node.left, index, 0))
+            else:
+                for neighbor in reversed(node.neighbors):
+                    if neighbor is not None:
+                        stack.append((neighbor, index, None))
+
+        n = len(values)
+        # Count children per node, turn the counts into offsets, then drop each child into its parent's block.
+        # Children are visited in order, so each block ends up in the original neighbor order.
+        offsets = _index_array(n + 1)
+        offsets.extend([0] * (n + 1))
+        for parent in parents:
+            if parent != NO_CHILD:
+                offsets[parent + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        children = _index_array(n)
+        children.extend([0] * max(n - 1, 0))
+        fill = offsets[:n]
+        left = right = None
+        if binary:
+            left = _index_array(n)
+            left.extend([NO_CHILD] * n)
+            right = _index_array(n)
+            right.extend([NO_CHILD] * n)
+        for i in range(1, n):
+            parent = parents[i]
+            children[fill[parent]] = i
+            fill[parent] += 1
+            if slots[i] == 0:
+                left[parent] = i
+            elif slots[i] == 1:
+                right[parent] = i
+        return cls(_value_store(values), offsets, children, left, right)
+
+    def to_node(self):
+        """
+        Rebuild the object graph: BinarySearchTreeNode objects if the tree has a left/right layout, Node otherwise.
+        :return: the root node, or None for an empty tree
+        """
+        n = len(self.values)
+        if n == 0:
+            return None
+        if self.left is not None:
+            nodes = [BinarySearchTreeNode(value) for value in self.values]
+            for i, node in enumerate(nodes):
+                if self.left[i] != NO_CHILD:
+                    node.left = nodes[self.left[i]]
+                if self.right[i] != NO_CHILD:
+                    node.right = nodes[self.right[i]]
+            return nodes[0]
+        nodes = [Node(value) for value in self.values]
+        offsets, children = self.offsets, self.children
+        for i, node in enumerate(nodes):
+            # Children in a tree are distinct, so skip add_neighbor's duplicate scan.
+            node.neighbors.extend(nodes[c] for c in children[offsets[i]:offsets[i + 1]])
+        return nodes[0]
+
+    def __len__(self):
+        return len(self.values)
+
+    def child_indices(self, i):
+        return self.children[self.offsets[i]:self.offsets[i + 1]]
+
+    def depths(self):
+        """:return: depths[i] is the number of edges from the root to node i"""
+        n = len(self.values)
+        depths = _index_array(n)
+        depths.extend([0] * n)
+        offsets, children = self.offsets, self.children
+        for i in range(n):
+            for j in range(offsets[i], offsets[i + 1]):
+                depths[children[j]] = depths[i] + 1
+        return depths
+
+    def dfs(self):
+        """Same string as DFS.recursive_dfs: pre-order values joined by "->"."""
+        return "->".join(self.values)
+
+    def sum_of_nodes(self):
+        return sum(self.values)
+
+    def max_node(self):
+        return max(self.values, default=float('-inf'))
+
+    def max_depth(self):
+        """
+        Same as DFS.recursive_max_depth_of_tree on the nodes: edges down to the deepest node, except that with a
+        left/right layout both child slots of a node count as a level even when empty, as they do for a
+        BinarySearchTreeNode, which makes it one more.
+        """
+        if not self.values:
+            return 0
+        return max(self.depths()) + (1 if self.left is not None else 0)
+
+    def _paths(self, keep):
+        """
+        Walk the nodes in index order (which is pre-order) keeping the current root-to-node path.
+        keep(i, path) decides whether the path ending at node i is collected.
+        """
+        depths = self.depths()
+        values = self.values
+        paths = []
+        current_path = []
+        for i in range(len(values)):
+            del current_path[depths[i]:]  # backtrack to the parent of node i
+            current_path.append(values[i])
+            if keep(i, current_path):
+                paths.append(current_path[:])
+        return paths
+
+    def find_all_paths(self):
+        """
+        Root-to-leaf paths, same as DFS.recursive_find_all_paths on the nodes. A node with a left/right layout always
+        has its two slots as neighbors, so like a BinarySearchTreeNode it is never a leaf and there are no paths.
+        """
+        if self.left is not None:
+            return []
+        offsets = self.offsets
+        return self._paths(lambda i, path: offsets[i] == offsets[i + 1])
+
+    def max_depth_paths(self):
+        """Paths down to the deepest nodes; the empty slots of a left/right layout add no node, so they do not count."""
+        if not self.values:
+            return []
+        depth = max(self.depths())
+        return self._paths(lambda i, path: len(path) == depth + 1)
+
+    def path_sum(self, target_sum):
+        running = []  # running[d] is the sum of the current path down to depth d
+
+        def keep(i, path):
+            del running[len(path) - 1:]
+            running.append((running[-1] if running else 0) + path[-1])
+            return running[-1] == target_sum
+
+        return self._paths(keep)
+
+    def _require_binary(self):
+        if self.left is None:
+            raise ValueError("this CompactTree has no left/right layout, build it from a BinarySearchTreeNode")
+
+    def is_binary_search_tree(self):
+        """
+        Every node must lie within the bounds set by its ancestors (equal values allowed, like DFS).
+        Parents come before children in index order, so one forward pass can hand each child its bounds.
+        """
+        self._require_binary()
+        values, left, right = self.values, self.left, self.right
+        n = len(values)
+        lows, highs = [None] * n, [None] * n
+        for i in range(n):
+            value, low, high = values[i], lows[i], highs[i]
+            if (low is not None and value < low) or (high is not None and value > high):
+                return False
+            if left[i] != NO_CHILD:
+                lows[left[i]], highs[left[i]] = low, value
+            if right[i] != NO_CHILD:
+                lows[right[i]], highs[right[i]] = value, high
+        return True
+
+    def tilt(self):
+        self._require_binary()
+        values, left, right = self.values, self.left, self.right
+        sums = [0] * (len(values) + 1)  # sums[NO_CHILD] is the trailing 0
+        total_tilt = 0
+        for i in reversed(range(len(values))):
+            left_sum, right_sum = sums[left[i]], sums[right[i]]
+            total_tilt += abs(left_sum - right_sum)
+            sums[i] = left_sum + right_sum + values[i]
+        return total_tilt
+
+    def diameter(self):
+        self._require_binary()
+        left, right = self.left, self.right
+        depths = [0] * (len(left) + 1)
+        max_diameter = 0
+        for i in reversed(range(len(left))):
+            left_depth, right_depth = depths[left[i]], depths[right[i]]
+            if left_depth + right_depth > max_diameter:
+                max_diameter = left_depth + right_depth
+            depths[i] = 1 + max(left_depth, right_depth)
+        return max_diameter
+
+    def universal_value_path(self):
+        self._require_binary()
+        values, left, right = self.values, self.left, self.right
+        depths = [0] * (len(values) + 1)
+        max_length = 0
+        for i in reversed(range(len(values))):
+            left_depth = 1 + depths[left[i]] if left[i] != NO_CHILD and values[left[i]] == values[i] else 0
+            right_depth = 1 + depths[right[i]] if right[i] != NO_CHILD and values[right[i]] == values[i] else 0
+            if left_depth + right_depth > max_length:
+                max_length = left_depth + right_depth
+            depths[i] = max(left_depth, right_depth)
+        return max_length
+
+    def summarize(self, start=0, end=None):
+        """
+        Fold the subtree rooted at start in one backward pass. Pre-order numbering keeps a subtree contiguous, so the
+        subtree of start is exactly the indices start..end-1 (end defaults to the end of the tree).
+        :return: for a left/right layout (sum, depth, universal depth, tilt, diameter, universal path, max), where depth
+        and universal depth are measured from start the way DFS.analyze does; for any other tree (sum, depth, max)
+        with depth in edges like DFS.recursive_max_depth_of_tree
+        """
+        if end is None:
+            end = len(self.values)
+        values = self.values
+        size = end - start
+        if size == 0:
+            return (0, 0, 0, 0, 0, 0, float('-inf')) if self.left is not None else (0, 0, float('-inf'))
+        if self.left is None:
+            depths = [0] * size
+            offsets, children = self.offsets, self.children
+            for i in range(start, end):
+                child_depth = depths[i - start] + 1
+                for j in range(offsets[i], offsets[i + 1]):
+                    depths[children[j] - start] = child_depth
+            return sum(values[start:end]), max(depths), max(values[start:end])
+
+        left, right = self.left, self.right
+        # Results of node i live at i - start; the extra last slot holds the zeros of a missing child.
+        sums, depths, universal_depths = [0] * (size + 1), [0] * (size + 1), [0] * (size + 1)
+        total_tilt = max_diameter = max_universal = 0
+        for i in reversed(range(start, end)):
+            value, left_child, right_child = values[i], left[i], right[i]
+            l = left_child - start if left_child != NO_CHILD else size
+            r = right_child - start if right_child != NO_CHILD else size
+            total_tilt += abs(sums[l] - sums[r])
+            if depths[l] + depths[r] > max_diameter:
+                max_diameter = depths[l] + depths[r]
+            left_universal = 1 + universal_depths[l] if left_child != NO_CHILD and values[left_child] == value else 0
+            right_universal = 1 + universal_depths[r] if right_child != NO_CHILD and values[right_child] == value else 0
+            if left_universal + right_universal > max_universal:
+                max_universal = left_universal + right_universal
+            k = i - start
+            sums[k] = sums[l] + sums[r] + value
+            depths[k] = 1 + max(depths[l], depths[r])
+            universal_depths[k] = max(left_universal, right_universal)
+        return (sums[0], depths[0], universal_depths[0], total_tilt, max_diameter, max_universal,
+                max(values[start:end]))
+
+    def summary_metrics(self, summary):
+        """
+        Name the fields of a summarize() result for the whole tree, with the metric names of DFS.analyze.
+        :return: dict metric -> value; a tree without a left/right layout only has sum, max and depth
+        """
+        if self.left is None:
+            total, depth, max_value = summary
+            return {'sum': total, 'max': max_value, 'depth': depth}
+        total, depth, _, total_tilt, max_diameter, max_universal, max_value = summary
+        return {'sum': total, 'max': max_value, 'depth': depth, 'tilt': total_tilt, 'diameter': max_diameter,
+                'universal_path': max_universal}
+
+
+if __name__ == "__main__":
+    a = Node(1)
+    b = Node(2)
+    c = Node(3)
+    d = Node(4)
+    e = Node(5)
+    a.add_neighbor(b)
+    a.add_neighbor(c)
+    b.add_neighbor(e)
+    b.add_neighbor(d)
+
+    tree = CompactTree.from_node(a)
+    assert list(tree.values) == [1, 2, 5, 4, 3], f"Expected pre-order values, but got {list(tree.values)}"
+    assert list(tree.child_indices(0)) == [1, 4], f"Expected [1, 4], but got {list(tree.child_indices(0))}"
+    assert tree.sum_of_nodes() == 15
+    assert tree.max_node() == 5
+    assert tree.max_depth() == 2
+    assert tree.find_all_paths() == [[1, 2, 5], [1, 2, 4], [1, 3]]
+    assert tree.max_depth_paths() == [[1, 2, 5], [1, 2, 4]]
+    assert tree.path_sum(7) == [[1, 2, 4]]
+    assert tree.summarize() == (15, 2, 5)
+
+    root = tree.to_node()
+    assert [n.value for n in root.neighbors] == [2, 3]
+    assert [n.value for n in root.neighbors[0].neighbors] == [5, 4]
+
+    #     4
+    #    / \
+    #   2   6
+    #  / \
+    # 1   3
+    a = BinarySearchTreeNode(4)
+    for value in (2, 6):
+        a.add_child(BinarySearchTreeNode(value))
+    for value in (1, 3):
+        a.left.add_child(BinarySearchTreeNode(value))
+    tree = CompactTree.from_node(a)
+    assert tree.is_binary_search_tree()
+    assert tree.tilt() == 2, f"Expected 2 but got {tree.tilt()}"
+    assert tree.diameter() == 3, f"Expected 3 but got {tree.diameter()}"
+    assert tree.summarize() == (16, 3, 0, 2, 3, 0, 6), f"Expected (16, 3, 0, 2, 3, 0, 6), but got {tree.summarize()}"
+    assert tree.summarize(1, 4) == (6, 2, 0, 2, 2, 0, 3), f"Expected the subtree of 2, but got {tree.summarize(1, 4)}"
+    # The store answers like the DFS methods on the nodes it was built from, empty left/right slots included
+    from dfs import DFS
+
+    dfs = DFS()
+    assert tree.max_depth() == dfs.recursive_max_depth_of_tree(a) == 3
+    assert tree.find_all_paths() == dfs.recursive_find_all_paths(a) == []
+    assert tree.max_depth_paths() == dfs.recursive_max_depth_path(a) == [[4, 2, 1], [4, 2, 3]]
+    assert tree.path_sum(7) == dfs.recursive_path_sum(a, 7) == [[4, 2, 1]]
+    nodes = Node.from_edges([(1, 2), (1, 3), (2, 5), (2, 4)])
+    general = CompactTree.from_node(nodes[1])
+    assert general.max_depth() == dfs.recursive_max_depth_of_tree(nodes[1])
+    assert general.find_all_paths() == dfs.recursive_find_all_paths(nodes[1])
+    assert general.max_depth_paths() == dfs.recursive_max_depth_path(nodes[1])
+    root = tree.to_node()
+    assert (root.left.value, root.right.value, root.left.left.value, root.left.right.value) == (2, 6, 1, 3)
+    assert root.right.left is None
+
+    shared = Node(1)
+    a = Node(0)
+    a.neighbors.extend([shared, shared])
+    try:
+        CompactTree.from_node(a)
+        assert False, "Expected ValueError for a node reached twice"
+    except ValueError:
+        pass
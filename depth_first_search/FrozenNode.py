@@ -0,0 +1,322 @@
+from hashlib import blake2b
+from weakref import WeakValueDictionary
+
+from Node import Node
+from BinarySearchTreeNode import BinarySearchTreeNode
+from LRUCache import LRUCache
+
+_NO_CHILD = bytes(16)  # fingerprint of an empty left / right slot
+
+# fingerprint -> the one FrozenNode with that structure, for as long as anything else still references it
+_interned = WeakValueDictionary()
+
+# (metric, node) -> that metric's partial result for the subtree under node, shared by every tree that contains it
+subtree_cache = LRUCache(1 << 16)
+
+
+class FrozenNode(Node):
+    """
+    An immutable tree node made by freeze(). Equal subtrees are hash-consed: there is exactly one FrozenNode per
+    distinct (value, children) structure, so a tree with many repeated subtrees stores each shape once, and two
+    frozen trees are equal exactly when they are the same object.
+    fingerprint is a Merkle hash: a digest of the value and the children's fingerprints, so it identifies the whole
+    subtree and is the same in every process. Values are hashed by type and repr, which must tell values apart
+    (ints, floats and strings do).
+    It has the same value / neighbors / left / right attributes as the node it was frozen from, so every DFS method
+    runs on it and gives the answer it gives on the original tree. iter_dfs / recursive_dfs, which visit a node
+    object once, walk every path of a frozen tree instead, since a repeated subtree is one object here. The subtree
+    metrics (sum, max, depth, tilt, diameter, universal path, analyze, the BST check) are
+    computed once per distinct subtree and kept in subtree_cache, see subtree_metric.
+    """
+
+    __slots__ = ('left', 'right', 'binary', 'fingerprint', '_hash', '__weakref__')
+
+    def __init__(self, value, children, binary, fingerprint):
+        set_attribute = object.__setattr__
+        set_attribute(self, 'value', value)
+        set_attribute(self, 'neighbors', children)
+        set_attribute(self, 'visited', False)
+        set_attribute(self, 'left', children[0] if binary else None)
+        set_attribute(self, 'right', children[1] if binary else None)
+        set_attribute(self, 'binary', binary)
+        set_attribute(self, 'fingerprint', fingerprint)
+        set_attribute(self, '_hash', int.from_bytes(fingerprint[:8], 'little'))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"FrozenNode is immutable, cannot set {name}")
+
+    def __hash__(self):
+        return self._hash
+
+    def unique_count(self):
+        """:return: number of distinct subtrees below and including this node, i.e. the nodes actually stored"""
+        seen = {id(self)}
+        stack = [self]
+        while stack:
+            for child in stack.pop().neighbors:
+                if child is not None and id(child) not in seen:
+                    seen.add(id(child))
+                    stack.append(child)
+        return len(seen)
+
+    def to_node(self):
+        """:return: a mutable copy, BinarySearchTreeNode or Node, with every repeated subtree copied out again"""
+        cls = BinarySearchTreeNode if self.binary else Node
+        root = cls(self.value)
+        stack = [(self, root)]
+        while stack:
+            frozen, copy = stack.pop()
+            for slot, child in enumerate(frozen.neighbors):
+                if child is None:
+                    continue
+                child_copy = cls(child.value)
+                if self.binary:
+                    if slot == 0:
+                        copy.left = child_copy
+                    else:
+                        copy.right = child_copy
+                else:
+                    copy.neighbors.append(child_copy)
+                stack.append((child, child_copy))
+        return root
+
+    def __repr__(self):
+        return f"FrozenNode({self.value!r}, {self.fingerprint.hex()[:8]})"
+
+
+def _intern(value, children, binary):
+    digest = blake2b(digest_size=16)
+    text = f"{type(value).__qualname__}:{value!r}".encode()
+    digest.update(b'B' if binary else b'N')
+    digest.update(len(text).to_bytes(8, 'little'))
+    digest.update(text)
+    for child in children:
+        digest.update(_NO_CHILD if child is None else child.fingerprint)
+    fingerprint = digest.digest()
+    node = _interned.get(fingerprint)
+    if node is None:
+        node = _interned[fingerprint] = FrozenNode(value, children, binary, fingerprint)
+    return node
+
+
+def freeze(root):
+    """
+    Turn a Node or BinarySearchTreeNode tree into FrozenNodes, children before parents, reusing the FrozenNode of
+    every subtree that was frozen before (in this tree or any other still alive).
+    A node reachable along several paths is frozen once; a cycle raises ValueError, since a frozen tree is built
+    bottom-up and cannot point back at an ancestor.
+    :param root: Node / BinarySearchTreeNode (left / right slots are kept), FrozenNode (returned as is) or None
+    :return: the frozen root
+    """
+    if root is None or isinstance(root, FrozenNode):
+        return root
+    binary = isinstance(root, BinarySearchTreeNode)
+    frozen = {}  # id(node) -> its FrozenNode
+    open_nodes = set()  # ids of the nodes on the current path
+    stack = [(root, False)]
+    while stack:
+        node, leaving = stack.pop()
+        children = (node.left, node.right) if binary else node.neighbors
+        if leaving:
+            frozen[id(node)] = _intern(node.value, tuple(None if child is None else frozen[id(child)]
+                                                         for child in children), binary)
+            open_nodes.discard(id(node))
+            continue
+        if id(node) in frozen:
+            continue
+        if id(node) in open_nodes:
+            raise ValueError(f"cannot freeze a graph with a cycle through {node!r}")
+        open_nodes.add(id(node))
+        stack.append((node, True))
+        stack.extend((child, False) for child in children if child is not None)
+    return frozen[id(root)]
+
+
+"""
+Each metric is a fold: combine(node, results) makes node's partial result from its children's, results lined up
+with node.neighbors (None for an empty slot), and answer() turns the root's partial result into what the DFS method
+returns. The binary ones read left = results[0], right = results[1].
+"""
+
+
+def _tilt(node, results):
+    left_sum, left_tilt = results[0] or (0, 0)
+    right_sum, right_tilt = results[1] or (0, 0)
+    return left_sum + right_sum + node.value, abs(left_sum - right_sum) + left_tilt + right_tilt
+
+
+def _diameter(node, results):
+    left_depth, left_best = results[0] or (0, 0)
+    right_depth, right_best = results[1] or (0, 0)
+    return 1 + max(left_depth, right_depth), max(left_best, right_best, left_depth + right_depth)
+
+
+def _universal_path(node, results):
+    left_down, left_best = results[0] or (0, 0)
+    right_down, right_best = results[1] or (0, 0)
+    left_down = 1 + left_down if node.left is not None and node.left.value == node.value else 0
+    right_down = 1 + right_down if node.right is not None and node.right.value == node.value else 0
+    return max(left_down, right_down), max(left_best, right_best, left_down + right_down)
+
+
+def _search_tree(strict):
+    """(is a BST, smallest value, largest value) of a subtree, see DFS.is_valid_bst"""
+
+    def combine(node, results):
+        left, right = results
+        value = node.value
+        valid = ((left is None or left[0] and (left[2] < value if strict else left[2] <= value))
+                 and (right is None or right[0] and (right[1] > value if strict else right[1] >= value)))
+        return valid, left[1] if left is not None else value, right[2] if right is not None else value
+
+    return combine
+
+
+def _first(result):
+    return result[0]
+
+
+def _second(result):
+    return result[1]
+
+
+# metric -> (combine, answer, binary only)
+_METRICS = {
+    'sum': (lambda node, results: node.value + sum(result for result in results if result is not None), None, False),
+    'max': (lambda node, results: max([node.value] + [result for result in results if result is not None]), None,
+            False),
+    # every neighbor slot counts one level, even an empty one, same as DFS.recursive_max_depth_of_tree
+    'depth': (lambda node, results: 1 + max(result or 0 for result in results) if results else 0, None, False),
+    'tilt': (_tilt, _second, True),
+    'diameter': (_diameter, _second, True),
+    'universal_path': (_universal_path, _second, True),
+    'bst': (_search_tree(False), _first, True),
+    'strict_bst': (_search_tree(True), _first, True),
+}
+_EMPTY = {'sum': 0, 'max': float('-inf'), 'depth': 0, 'tilt': 0, 'diameter': 0, 'universal_path': 0, 'bst': True,
+          'strict_bst': True}
+
+
+def subtree_metric(root, metric):
+    """
+    Fold metric over a frozen tree, computing each distinct subtree at most once: the walk does not go below a
+    subtree whose result is in subtree_cache or was already computed in this call, so the work grows with the number
+    of distinct subtrees rather than with the number of nodes. Results computed here go into the cache for later
+    calls; since it is bounded, evicted subtrees are simply computed again when needed.
+    :param root: FrozenNode or None
+    :param metric: 'sum', 'max', 'depth', or for binary trees 'tilt', 'diameter', 'universal_path', 'bst' and
+    'strict_bst' (is_valid_bst with strict=False / True)
+    :return: the same value as the corresponding DFS method
+    """
+    combine, answer, binary_only = _METRICS[metric]
+    if root is None:
+        return _EMPTY[metric]
+    if binary_only and not root.binary:
+        raise ValueError(f"{metric} needs a binary tree, freeze a BinarySearchTreeNode")
+    cache = subtree_cache
+    found = {}  # id(node) -> result, keeps this call's results even if the cache evicts them meanwhile
+    stack = [(root, False)]
+    while stack:
+        node, leaving = stack.pop()
+        if leaving:
+            result = combine(node, [None if child is None else found[id(child)] for child in node.neighbors])
+            found[id(node)] = result
+            cache.put((metric, node), result)
+            continue
+        if id(node) in found:  # a repeated subtree, finished earlier in this walk
+            continue
+        result = cache.get((metric, node))
+        if result is not None:
+            found[id(node)] = result
+            continue
+        stack.append((node, True))
+        stack.extend((child, False) for child in node.neighbors if child is not None)
+    result = found[id(root)]
+    return result if answer is None else answer(result)
+
+
+if __name__ == "__main__":
+    # DFS checks for the FrozenNode class of the imported module, so the tests use that module, not this script
+    import FrozenNode as frozen_module
+    from FrozenNode import freeze, subtree_metric, _intern
+    from dfs import DFS
+
+    dfs = DFS()
+
+    def all_fours(depth):
+        """A perfect BinarySearchTreeNode tree of 2^(depth + 1) - 1 nodes, all 4, linked by hand like the tests do."""
+        root = BinarySearchTreeNode(4)
+        level = [root]
+        for _ in range(depth):
+            next_level = []
+            for node in level:
+                node.left = BinarySearchTreeNode(4)
+                node.right = BinarySearchTreeNode(4)
+                next_level += [node.left, node.right]
+            level = next_level
+        return root
+
+    # Repeated subtrees are stored once, and every metric matches the DFS method on the original tree
+    tree = all_fours(12)
+    frozen = freeze(tree)
+    assert frozen.unique_count() == 13, f"Expected one node per level, but got {frozen.unique_count()}"
+    assert frozen.left is frozen.right and freeze(all_fours(12)) is frozen
+    assert dfs.analyze(frozen) == dfs.analyze(tree), f"Expected {dfs.analyze(tree)}, but got {dfs.analyze(frozen)}"
+    for method in ('recursive_sum_of_nodes', 'recursive_max_node', 'recursive_max_depth_of_tree', 'calculate_tilt',
+                   'max_diameter', 'max_universal_value_path'):
+        assert getattr(dfs, method)(frozen) == getattr(dfs, method)(tree), method
+    assert dfs.recursive_dfs(freeze(Node.from_edges([("a", "b"), ("a", "c")])["a"])) == "a->b->c"
+    twins = Node("a")
+    for _ in range(2):
+        child = Node("b")
+        child.add_neighbor(Node("c"))
+        twins.add_neighbor(child)
+    assert freeze(twins).unique_count() == 3
+    assert dfs.recursive_dfs(freeze(twins)) == dfs.recursive_dfs(twins) == "a->b->c->b->c"
+
+    # A tree far too big to walk node by node: 2^61 - 1 nodes, 61 distinct subtrees
+    huge = frozen
+    for _ in range(48):
+        huge = _intern(4, (huge, huge), True)
+    assert dfs.recursive_sum_of_nodes(huge) == 4 * (2 ** 61 - 1) and dfs.max_diameter(huge) == 120
+    assert dfs.max_universal_value_path(huge) == 120 and dfs.calculate_tilt(huge) == 0
+
+    #     4
+    #    / \
+    #   2   6
+    #  / \
+    # 1   3
+    root = BinarySearchTreeNode(4)
+    for value in (2, 6):
+        root.add_child(BinarySearchTreeNode(value))
+    for value in (1, 3):
+        root.left.add_child(BinarySearchTreeNode(value))
+    frozen = freeze(root)
+    assert dfs.analyze(frozen) == dfs.analyze(root) and dfs.recursive_binary_search_tree(frozen)
+    assert [node.value for node in dfs.iter_in_order(frozen)] == [1, 2, 3, 4, 6]
+    assert not dfs.is_valid_bst(tree) and dfs.is_valid_bst(freeze(tree), strict=False) and not dfs.is_valid_bst(huge)
+    five = BinarySearchTreeNode(5)
+    root.left.right.right = five  # a 5 under the 3 in the left subtree of 4
+    assert not dfs.is_valid_bst(freeze(root)) and not dfs.is_valid_bst(root)
+    root.left.right.right = None
+    assert freeze(root.left) is frozen.left and freeze(root.left.left) is not freeze(root.left.right)
+    copy = frozen.to_node()
+    assert dfs.analyze(copy) == dfs.analyze(root) and freeze(copy) is frozen
+    assert hash(frozen) == hash(freeze(copy)) and frozen.fingerprint != frozen.left.fingerprint
+
+    # Values of different types are different subtrees, nodes cannot change, cycles cannot be frozen
+    assert freeze(Node(1)) is not freeze(Node(1.0)) and freeze(Node(1)) is not freeze(BinarySearchTreeNode(1))
+    try:
+        frozen.value = 5
+        assert False, "Expected AttributeError when assigning to a FrozenNode"
+    except AttributeError:
+        pass
+    try:
+        freeze(Node.from_edges([(1, 2), (2, 1)])[1])
+        assert False, "Expected ValueError for a cycle"
+    except ValueError:
+        pass
+
+    # A small cache still gives the right answers, it only forgets results
+    frozen_module.subtree_cache = LRUCache(2)
+    assert subtree_metric(freeze(all_fours(10)), 'sum') == 4 * (2 ** 11 - 1) and len(frozen_module.subtree_cache) == 2
@@ -0,0 +1,232 @@
+from array import array
+from itertools import accumulate
+
+from BinarySearchTreeNode import BinarySearchTreeNode
+from CompactTree import CompactTree, NO_CHILD
+
+_BLOCK = 32  # positions per block of the range-minimum index
+
+
+class LCAIndex:
+    """
+    Answers "lowest common ancestor", "distance" and "path" questions between any two nodes of one static tree,
+    after one O(n) build, instead of one O(n) walk per question.
+    Nodes are numbered 0..n-1 in pre-order, as in CompactTree. In pre-order, the nodes strictly after u up to and
+    including v (u < v) contain the child of lca(u, v) on the way to v, and it is the shallowest of them, so
+    lca(u, v) = parent of the shallowest node in positions u + 1 .. v: a range minimum over depths.
+    Each position's key packs depth * n + index into one int, so the minimum of keys is simply min(). The keys are cut
+    into blocks of _BLOCK, with the running minimum from each block's start (prefix) and towards its end (suffix), and a
+    sparse table over the block minima (level k holds the minimum of 2^k blocks) covers any run of whole blocks with
+    two overlapping entries. A query across blocks is then min(suffix[u], two table entries, prefix[v]): O(1), and the
+    index takes about four int64s per node instead of the log2(n) per node of a sparse table over every position.
+    :param root: Node / BinarySearchTreeNode tree (BinarySearchTreeNode children are left / right), or a CompactTree,
+    whose nodes are then given and returned as indices
+    """
+
+    __slots__ = ('nodes', 'parents', 'depths', '_index', '_keys', '_prefix', '_suffix', '_table')
+
+    def __init__(self, root):
+        if isinstance(root, CompactTree):
+            self.nodes = None
+            self._index = None
+            parents = array('q', [NO_CHILD]) * len(root)
+            offsets, children = root.offsets, root.children
+            for i in range(len(root)):
+                for j in range(offsets[i], offsets[i + 1]):
+                    parents[children[j]] = i
+        else:
+            self.nodes, parents = _pre_order(root)
+            self._index = {id(node): i for i, node in enumerate(self.nodes)}
+        n = len(parents)
+        depths = array('q', [0]) * n
+        for i in range(1, n):  # a parent comes before its children in pre-order
+            depths[i] = depths[parents[i]] + 1
+        self.parents = parents
+        self.depths = depths
+
+        keys = array('q', (depths[i] * n + i for i in range(n)))
+        prefix = array('q')
+        suffix = array('q')
+        for start in range(0, n, _BLOCK):
+            block = keys[start:start + _BLOCK]
+            prefix.extend(accumulate(block, min))
+            suffix.extend(reversed(list(accumulate(reversed(block), min))))
+        level = array('q', (suffix[start] for start in range(0, n, _BLOCK)))
+        table = [level]
+        width = 1
+        while 2 * width <= len(level):
+            level = array('q', map(min, level[:len(level) - width], level[width:]))
+            table.append(level)
+            width *= 2
+        self._keys = keys
+        self._prefix = prefix
+        self._suffix = suffix
+        self._table = table
+
+    def __len__(self):
+        return len(self.parents)
+
+    def _number(self, node):
+        if self._index is None:
+            if not 0 <= node < len(self.parents):
+                raise ValueError(f"{node!r} is not a node index of this tree")
+            return node
+        i = self._index.get(id(node))
+        if i is None:
+            raise ValueError(f"{node!r} is not in this tree")
+        return i
+
+    def _node(self, i):
+        return i if self.nodes is None else self.nodes[i]
+
+    def _lca(self, u, v):
+        if u == v:
+            return u
+        if u > v:
+            u, v = v, u
+        u += 1
+        first, last = u // _BLOCK, v // _BLOCK
+        if first == last:
+            shallowest = min(self._keys[u:v + 1])
+        else:
+            shallowest = min(self._suffix[u], self._prefix[v])
+            if last - first > 1:  # whole blocks in between
+                first, last = first + 1, last - 1
+                level = (last - first + 1).bit_length() - 1
+                row = self._table[level]
+                shallowest = min(shallowest, row[first], row[last - (1 << level) + 1])
+        return self.parents[shallowest % len(self.parents)]
+
+    def lca(self, u, v):
+        """:return: the deepest node that has both u and v in its subtree (a node counts as its own ancestor)"""
+        return self._node(self._lca(self._number(u), self._number(v)))
+
+    def distance(self, u, v):
+        """:return: number of edges on the path between u and v"""
+        u, v = self._number(u), self._number(v)
+        depths = self.depths
+        return depths[u] + depths[v] - 2 * depths[self._lca(u, v)]
+
+    def path(self, u, v):
+        """:return: the nodes on the path from u up to their lca and down to v, both ends included"""
+        u, v = self._number(u), self._number(v)
+        ancestor = self._lca(u, v)
+        parents = self.parents
+        up = [u]
+        while up[-1] != ancestor:
+            up.append(parents[up[-1]])
+        down = []
+        while v != ancestor:
+            down.append(v)
+            v = parents[v]
+        return [self._node(i) for i in up + down[::-1]]
+
+    def lcas(self, pairs):
+        """lca of every (u, v) pair, in one call: list of nodes"""
+        number, lca, node = self._number, self._lca, self._node
+        return [node(lca(number(u), number(v))) for u, v in pairs]
+
+    def distances(self, pairs):
+        """distance of every (u, v) pair, in one call: list of ints"""
+        number, lca, depths = self._number, self._lca, self.depths
+        results = []
+        for u, v in pairs:
+            u, v = number(u), number(v)
+            results.append(depths[u] + depths[v] - 2 * depths[lca(u, v)])
+        return results
+
+    def paths(self, pairs):
+        """path of every (u, v) pair, in one call: list of node lists"""
+        return [self.path(u, v) for u, v in pairs]
+
+
+def _pre_order(root):
+    """
+    :return: (nodes in pre-order, parent index of each, NO_CHILD for the root), numbered like CompactTree.from_node;
+    raises ValueError if a node is reachable twice
+    """
+    binary = isinstance(root, BinarySearchTreeNode)
+    nodes = []
+    parents = array('q')
+    seen = set()
+    stack = [(root, NO_CHILD)] if root is not None else []
+    while stack:
+        node, parent = stack.pop()
+        if id(node) in seen:
+            raise ValueError(f"{node!r} is reachable more than once, not a tree")
+        seen.add(id(node))
+        index = len(nodes)
+        nodes.append(node)
+        parents.append(parent)
+        children = (node.left, node.right) if binary else node.neighbors
+        stack.extend((child, index) for child in reversed(children) if child is not None)
+    return nodes, parents
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from Node import Node
+
+    #     4
+    #    / \
+    #   2   6
+    #  / \
+    # 1   3
+    root = BinarySearchTreeNode(4)
+    for value in (2, 6):
+        root.add_child(BinarySearchTreeNode(value))
+    for value in (1, 3):
+        root.left.add_child(BinarySearchTreeNode(value))
+    one, three, six = root.left.left, root.left.right, root.right
+    index = LCAIndex(root)
+    assert index.lca(one, three) is root.left and index.lca(one, six) is root and index.lca(one, root.left) is root.left
+    assert index.distance(one, six) == 3 and index.distance(three, three) == 0
+    assert [node.value for node in index.path(three, six)] == [3, 2, 4, 6], \
+        f"Expected [3, 2, 4, 6], but got {index.path(three, six)}"
+    assert [node.value for node in index.path(root, one)] == [4, 2, 1]
+    assert index.distances([(one, three), (six, one)]) == [2, 3] and index.lcas([(six, six)]) == [six]
+    try:
+        index.lca(one, BinarySearchTreeNode(1))
+        assert False, "Expected ValueError for a node of another tree"
+    except ValueError:
+        pass
+
+    # Random trees against walking the parent links, for Node trees and the same trees as CompactTrees
+    rng = random.Random(5)
+    for n in (1, 2, 3, 50, 333):
+        nodes = Node.from_edges([(rng.randrange(i), i) for i in range(1, n)]) if n > 1 else {0: Node(0)}
+        parent = {child.value: node.value for node in nodes.values() for child in node.neighbors}
+
+        def ancestors(value):
+            chain = [value]
+            while chain[-1] in parent:
+                chain.append(parent[chain[-1]])
+            return chain
+
+        index = LCAIndex(nodes[0])
+        compact_index = LCAIndex(CompactTree.from_node(nodes[0]))
+        pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(200)]
+        for (u, v), lca, distance in zip(pairs, index.lcas((nodes[u], nodes[v]) for u, v in pairs),
+                                         index.distances((nodes[u], nodes[v]) for u, v in pairs)):
+            up = ancestors(u)
+            expected = next(a for a in ancestors(v) if a in up)
+            assert lca.value == expected, f"Expected lca {expected} of {u} and {v}, but got {lca}"
+            assert distance == up.index(expected) + ancestors(v).index(expected)
+            path = [node.value for node in index.path(nodes[u], nodes[v])]
+            assert len(path) == distance + 1 and path[0] == u and path[-1] == v
+            assert all(parent.get(a) == b or parent.get(b) == a for a, b in zip(path, path[1:]))
+            i, j = index._number(nodes[u]), index._number(nodes[v])
+            assert compact_index.lca(i, j) == index._number(lca) and compact_index.distance(i, j) == distance
+
+    # A path of 10^5 nodes: no recursion, and 2 * 10^5 batched queries
+    n = 100000
+    nodes = Node.from_edges([(i, i + 1) for i in range(n - 1)])
+    index = LCAIndex(nodes[0])
+    assert index.distance(nodes[n - 1], nodes[0]) == n - 1 and len(index.path(nodes[0], nodes[n - 1])) == n
+    pairs = [(nodes[rng.randrange(n)], nodes[rng.randrange(n)]) for _ in range(2 * 10 ** 5)]
+    start = time.perf_counter()
+    distances = index.distances(pairs)
+    assert time.perf_counter() - start < 10
+    assert all(d == abs(u.value - v.value) for d, (u, v) in zip(distances, pairs))
@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    At most capacity records, the least recently used one is dropped first.
+    get and put hold a lock, so threads sharing one cache cannot evict a key between its lookup and its move to the
+    end of the order.
+    """
+
+    __slots__ = ('capacity', '_records', '_lock')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                self._records.move_to_end(key)
+            return record
+
+    def put(self, key, record):
+        with self._lock:
+            self._records[key] = record
+            self._records.move_to_end(key)
+            if len(self._records) > self.capacity:
+                self._records.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # "b" is now the least recently used
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3 and len(cache) == 2
+
+    # Threads reading and evicting the same small cache
+    cache = LRUCache(8)
+
+    def churn(offset):
+        for i in range(20000):
+            key = (i + offset) % 32
+            if cache.get(key) is None:
+                cache.put(key, key)
+        return True
+
+    with ThreadPoolExecutor(8) as pool:
+        assert all(pool.map(churn, range(8)))
+    assert len(cache) <= 8
@@ -1,15 +1,97 @@
+_SCAN_LIMIT = 16  # add_neighbors scans the list for batches up to this size instead of building an id set
+
+
 class Node:
+    # No per-instance __dict__: a node only ever carries these three attributes.
+    __slots__ = ('value', 'neighbors', 'visited')
+
     def __init__(self, value):
         self.value = value
         self.neighbors = []
         self.visited = False
 
     def add_neighbor(self, neighbor):
+        """
+        Add neighbor unless it already is one. The check is a scan of the list, which runs in C and is the fastest
+        option for the small degrees of most nodes; add_neighbors or from_edges hash instead for many edges at once.
+        Nothing is cached on the node, so the list can be edited directly at any time.
+        """
         if neighbor not in self.neighbors:
             self.neighbors.append(neighbor)
 
+    def add_neighbors(self, neighbors):
+        """
+        Add many neighbors at once, skipping duplicates and keeping first-seen order.
+        A small batch is checked by scanning the list, like add_neighbor. For a larger one the ids of the current
+        neighbors go into a set built for this call only, and every new neighbor is a single set lookup, so adding k
+        neighbors to a node of degree d costs O(d + k) instead of O(d * k).
+        """
+        neighbors = list(neighbors)
+        if len(neighbors) <= _SCAN_LIMIT:
+            for neighbor in neighbors:
+                self.add_neighbor(neighbor)
+            return
+        seen = {id(neighbor) for neighbor in self.neighbors}
+        for neighbor in neighbors:
+            if id(neighbor) not in seen:
+                seen.add(id(neighbor))
+                self.neighbors.append(neighbor)
+
+    @classmethod
+    def from_edges(cls, edges, directed=True):
+        """
+        Build a graph from (u, v) pairs in one pass. Each distinct label becomes one node with that label as its
+        value, and each neighbor list keeps the order in which its edges first appeared, same as repeated
+        add_neighbor calls would, but duplicate edges are dropped with a set of seen pairs instead of a list scan.
+        :param edges: any iterable of (u, v) pairs, e.g. a generator reading a file
+        :param directed: if False every edge also links v back to u
+        :return: dict mapping each label to its node
+        """
+        nodes = {}
+        seen = set()
+
+        def link(u, v):
+            if (u, v) in seen:
+                return
+            seen.add((u, v))
+            if u not in nodes:
+                nodes[u] = cls(u)
+            if v not in nodes:
+                nodes[v] = cls(v)
+            nodes[u].neighbors.append(nodes[v])
+
+        for u, v in edges:
+            link(u, v)
+            if not directed:
+                link(v, u)
+        return nodes
+
     def reset_visited(self):
+        """DFS keeps its own per-call visited set (see DFS.iter_dfs) and never reads this flag."""
         self.visited = False
 
     def __repr__(self):
         return f"Node({self.value})"
+
+
+if __name__ == "__main__":
+    hub = Node(0)
+    leaves = [Node(i) for i in range(1, 41)]
+    hub.add_neighbor(leaves[0])
+    hub.add_neighbors([leaves[0], leaves[1], leaves[1]])
+    hub.neighbors.append(leaves[2])  # editing the list directly is fine, nothing is cached
+    hub.add_neighbor(leaves[2])
+    hub.add_neighbors(leaves[:5])
+    assert [node.value for node in hub.neighbors] == [1, 2, 3, 4, 5], f"Expected [1, 2, 3, 4, 5], but got {hub.neighbors}"
+    hub.add_neighbors(leaves + leaves)  # a batch large enough for the id set
+    assert [node.value for node in hub.neighbors] == list(range(1, 41))
+
+    # Removing and appending neighbors directly keeps the duplicate checks right
+    x, y = Node("x"), Node("y")
+    a = Node("a")
+    a.add_neighbor(x)
+    a.neighbors.remove(x)
+    a.neighbors.append(y)
+    a.add_neighbor(y)
+    a.add_neighbor(x)
+    assert a.neighbors == [y, x], f"Expected [y, x], but got {a.neighbors}"
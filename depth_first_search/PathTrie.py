@@ -0,0 +1,65 @@
+from array import array
+
+NO_PARENT = -1
+
+
+class PathTrie:
+    """
+    A list of root-to-node paths stored as a prefix trie instead of one list per path.
+    Every entry is a (value, parent entry) pair, so paths that share a prefix share its entries, and each path is
+    just the index of its last entry. A path is only turned into a list when it is read (indexing or iterating).
+    """
+
+    __slots__ = ('values', 'parents', 'ends')
+
+    def __init__(self):
+        self.values = []
+        self.parents = array('q')
+        self.ends = array('q')
+
+    def add(self, value, parent=NO_PARENT):
+        """
+        Add an entry below parent (NO_PARENT for a path start).
+        :return: index of the new entry
+        """
+        self.values.append(value)
+        self.parents.append(parent)
+        return len(self.values) - 1
+
+    def mark(self, entry):
+        """Record the path that ends at entry."""
+        self.ends.append(entry)
+
+    def path(self, entry):
+        """:return: list of values from the path start down to entry"""
+        path = []
+        while entry != NO_PARENT:
+            path.append(self.values[entry])
+            entry = self.parents[entry]
+        path.reverse()
+        return path
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, i):
+        return self.path(self.ends[i])
+
+    def __iter__(self):
+        for entry in self.ends:
+            yield self.path(entry)
+
+    def __repr__(self):
+        return f"PathTrie({len(self.ends)} paths, {len(self.values)} entries)"
+
+
+if __name__ == "__main__":
+    trie = PathTrie()
+    root = trie.add(1)
+    two = trie.add(2, root)
+    trie.mark(trie.add(5, two))
+    trie.mark(trie.add(4, two))
+    trie.mark(trie.add(3, root))
+    assert list(trie) == [[1, 2, 5], [1, 2, 4], [1, 3]], f"Expected 3 paths, but got {list(trie)}"
+    assert trie[1] == [1, 2, 4], f"Expected [1, 2, 4], but got {trie[1]}"
+    assert len(trie) == 3 and len(trie.values) == 5
@@ -0,0 +1,267 @@
+"""
+A CompactTree on disk. write_tree() stores one, TreeFile maps it back in without parsing, load_tree() copies it.
+
+File layout, every section starting at a multiple of 8 bytes:
+
+    header    magic "DFST", version, value type, index type, flags, n (number of nodes)   little-endian, 16 bytes
+    values    n int64 ('q') or float64 ('d'); for strings ('s') n + 1 int64 offsets into a UTF-8 blob, then the blob
+    offsets   n + 1 indices       CompactTree's CSR arrays, 'i' (int32) or 'q' (int64) indices
+    children  n - 1 indices
+    left      n indices           left / right only when flags has _BINARY set
+    right     n indices
+
+The arrays are written in the byte order of the machine that wrote them (flags has _BIG_ENDIAN set on big-endian
+machines), so the reader can hand out memoryviews of the file without converting anything.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+
+from CompactTree import CompactTree
+
+MAGIC = b'DFST'
+VERSION = 1
+_HEADER = struct.Struct('<4sBccBQ')
+_BINARY = 1
+_BIG_ENDIAN = 2
+
+
+def _padding(size):
+    return -size % 8
+
+
+def _value_kind(values):
+    if isinstance(values, (array, memoryview)):
+        code = values.typecode if isinstance(values, array) else values.format
+        if code in ('q', 'd'):
+            return code
+    if all(type(value) is str for value in values):
+        return 's'
+    raise ValueError("only int64, float64 or str node values can be written to a tree file")
+
+
+def write_tree(path, tree):
+    """
+    Write a tree to path in the format above.
+    :param path: file name
+    :param tree: CompactTree, Node or BinarySearchTreeNode root (BinarySearchTreeNode trees keep their left/right layout)
+    :return: number of nodes written
+    """
+    if not isinstance(tree, CompactTree):
+        tree = CompactTree.from_node(tree)
+    n = len(tree)
+    kind = _value_kind(tree.values) if n else 'q'
+    index_code = 'i' if n < 2 ** 31 else 'q'
+    flags = (_BINARY if tree.left is not None else 0) | (_BIG_ENDIAN if sys.byteorder == 'big' else 0)
+
+    sections = []
+    if kind == 's':
+        encoded = [value.encode() for value in tree.values]
+        string_offsets = array('q', [0])
+        for value in encoded:
+            string_offsets.append(string_offsets[-1] + len(value))
+        sections.append(string_offsets.tobytes())
+        sections.append(b''.join(encoded))
+    else:
+        sections.append(array(kind, tree.values).tobytes())
+    for indices in (tree.offsets, tree.children, tree.left, tree.right):
+        if indices is not None:
+            sections.append(array(index_code, indices).tobytes())
+
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, kind.encode(), index_code.encode(), flags, n))
+        for section in sections:
+            file.write(section)
+            file.write(bytes(_padding(len(section))))
+    return n
+
+
+class _StringValues:
+    """Read-only sequence of the str values of a tree file, each decoded from the mapped blob when it is read."""
+
+    __slots__ = ('offsets', 'blob')
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode()
+
+    def __iter__(self):
+        offsets, blob = self.offsets, self.blob
+        for i in range(len(offsets) - 1):
+            yield bytes(blob[offsets[i]:offsets[i + 1]]).decode()
+
+
+class TreeFile:
+    """
+    A tree file opened through mmap. tree is a CompactTree whose arrays are memoryviews of the mapping, so opening
+    the file reads nothing but the header, the OS pages data in as the traversal touches it, and every DFS method that
+    accepts a CompactTree (aggregates, paths, analyze, ...) runs straight over the file without building node objects.
+    The views are only valid while the file is open; copy what you need to keep, or use load_tree().
+    Use it as a context manager or call close(); close() fails with BufferError while slices of the views (e.g. from
+    tree.child_indices) are still alive.
+    """
+
+    __slots__ = ('tree', '_file', '_mmap', '_views')
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not a tree file")
+        self._views = []
+        try:
+            self.tree = self._read(path)
+        except Exception:
+            self.close()
+            raise
+
+    def _read(self, path):
+        buffer = memoryview(self._mmap)
+        self._views.append(buffer)
+        if len(buffer) < _HEADER.size:
+            raise ValueError(f"{path} is not a tree file")
+        magic, version, kind, index_code, flags, n = _HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a tree file")
+        if version != VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {VERSION}")
+        if bool(flags & _BIG_ENDIAN) != (sys.byteorder == 'big'):
+            raise ValueError(f"{path} was written on a machine with the other byte order, rewrite it with write_tree")
+        kind, index_code = kind.decode(), index_code.decode()
+        position = _HEADER.size
+
+        def section(code, count):
+            nonlocal position
+            size = count * struct.calcsize(code)
+            if position + size > len(buffer):
+                raise ValueError(f"{path} is truncated")
+            view = buffer[position:position + size].cast(code)
+            self._views.append(view)
+            position += size + _padding(size)
+            return view
+
+        if kind == 's':
+            string_offsets = section('q', n + 1)
+            values = _StringValues(string_offsets, section('B', string_offsets[n]))
+        else:
+            values = section(kind, n)
+        offsets = section(index_code, n + 1)
+        children = section(index_code, max(n - 1, 0))
+        left = right = None
+        if flags & _BINARY:
+            left = section(index_code, n)
+            right = section(index_code, n)
+        return CompactTree(values, offsets, children, left, right)
+
+    def to_node(self):
+        """:return: the tree rebuilt as Node / BinarySearchTreeNode objects, see CompactTree.to_node"""
+        return self.tree.to_node()
+
+    def close(self):
+        if self._mmap.closed:
+            return
+        self.tree = None
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _copy(view):
+    copy = array(view.format)
+    copy.frombytes(view.cast('B'))
+    return copy
+
+
+def load_tree(path):
+    """
+    Read a tree file into a CompactTree that owns its arrays (unlike TreeFile, it stays valid after the file is
+    closed and can be pickled, e.g. for parallel.analyze_parallel).
+    """
+    with TreeFile(path) as tree_file:
+        tree = tree_file.tree
+        values = list(tree.values) if isinstance(tree.values, _StringValues) else _copy(tree.values)
+        arrays = [_copy(indices) if indices is not None else None
+                  for indices in (tree.offsets, tree.children, tree.left, tree.right)]
+    return CompactTree(values, *arrays)
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    from Node import Node
+    from BinarySearchTreeNode import BinarySearchTreeNode
+    from dfs import DFS
+
+    dfs = DFS()
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "tree.dfst")
+
+    #     4
+    #    / \
+    #   2   6
+    #  / \
+    # 1   3
+    root = BinarySearchTreeNode(4)
+    for value in (2, 6):
+        root.add_child(BinarySearchTreeNode(value))
+    for value in (1, 3):
+        root.left.add_child(BinarySearchTreeNode(value))
+    assert write_tree(path, root) == 5
+    with TreeFile(path) as tree_file:
+        tree = tree_file.tree
+        assert isinstance(tree.values, memoryview) and list(tree.values) == [4, 2, 1, 3, 6]
+        assert dfs.recursive_sum_of_nodes(tree) == 16 and dfs.recursive_max_node(tree) == 6
+        assert dfs.recursive_binary_search_tree(tree) and dfs.calculate_tilt(tree) == 2
+        assert dfs.analyze(tree) == dfs.analyze(root), f"Expected {dfs.analyze(root)}, but got {dfs.analyze(tree)}"
+        for method in ('recursive_max_depth_of_tree', 'recursive_find_all_paths', 'recursive_max_depth_path'):
+            assert getattr(dfs, method)(tree) == getattr(dfs, method)(root), method
+        copy = tree_file.to_node()
+        del tree
+    assert (copy.left.value, copy.right.value, copy.left.left.value, copy.left.right.value) == (2, 6, 1, 3)
+    assert dfs.analyze(load_tree(path)) == dfs.analyze(root)
+
+    # String values, a Node tree with no left/right layout, and path enumeration over the mapping
+    nodes = Node.from_edges([("A", "B"), ("A", "C"), ("B", "E"), ("B", "D")])
+    write_tree(path, nodes["A"])
+    with TreeFile(path) as tree_file:
+        assert dfs.recursive_dfs(tree_file.tree) == "A->B->E->D->C"
+        assert dfs.recursive_find_all_paths(tree_file.tree) == [["A", "B", "E"], ["A", "B", "D"], ["A", "C"]]
+    assert dfs.recursive_dfs(load_tree(path).to_node()) == "A->B->E->D->C"
+
+    # Floats, an empty tree, and files that are not tree files
+    write_tree(path, CompactTree.from_node(Node(2.5)))
+    assert load_tree(path).sum_of_nodes() == 2.5
+    write_tree(path, CompactTree.from_node(None))
+    assert len(load_tree(path)) == 0
+    with open(path, 'wb') as file:
+        file.write(b'not a tree file at all')
+    try:
+        TreeFile(path)
+        assert False, "Expected ValueError for a file without the DFST header"
+    except ValueError:
+        pass
+    os.remove(path)
+    os.rmdir(directory)
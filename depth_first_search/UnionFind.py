@@ -0,0 +1,84 @@
+from array import array
+
+
+class UnionFind:
+    """
+    Disjoint-set forest over the vertices 0..n-1, fed one undirected edge at a time.
+    parent[x] points towards the root of x's set and rank[x] bounds the height of the tree under x. find() flattens
+    the path it walks (path compression) and union() hangs the shorter tree under the taller one (union by rank), so
+    each edge costs almost O(1) and no adjacency lists are ever built.
+    """
+
+    __slots__ = ('parent', 'rank', 'components', 'has_cycle')
+
+    def __init__(self, n):
+        self.parent = array('i' if n < 2 ** 31 else 'q', range(n))
+        self.rank = bytearray(n)  # ranks never exceed log2(n), so a byte each is plenty
+        self.components = n
+        self.has_cycle = False
+
+    def find(self, x):
+        """:return: the root of the set containing x"""
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:  # second pass: point everything on the path straight at the root
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, u, v):
+        """
+        Add the edge u-v.
+        :return: True if it joined two components, False if u and v were already connected (the edge closes a cycle)
+        """
+        n = len(self.parent)
+        if not (0 <= u < n and 0 <= v < n):
+            raise ValueError(f"edge ({u}, {v}) has a vertex outside 0..{n - 1}")
+        root_u, root_v = self.find(u), self.find(v)
+        if root_u == root_v:
+            self.has_cycle = True
+            return False
+        if self.rank[root_u] < self.rank[root_v]:
+            root_u, root_v = root_v, root_u
+        self.parent[root_v] = root_u
+        if self.rank[root_u] == self.rank[root_v]:
+            self.rank[root_u] += 1
+        self.components -= 1
+        return True
+
+    def add_edges(self, edges):
+        """
+        Consume edges from any iterable until the first one that closes a cycle.
+        :return: False if a cycle was found (the rest of the iterable is left unread), True otherwise
+        """
+        union = self.union
+        for u, v in edges:
+            if not union(u, v):
+                return False
+        return True
+
+    def same_component(self, u, v):
+        return self.find(u) == self.find(v)
+
+    def is_tree(self):
+        """A valid tree is connected (one component) and has no cycles."""
+        return not self.has_cycle and self.components == 1
+
+
+if __name__ == "__main__":
+    uf = UnionFind(5)
+    assert uf.add_edges([(0, 1), (0, 2), (0, 3)])
+    assert uf.components == 2 and not uf.is_tree()
+    assert uf.same_component(1, 3) and not uf.same_component(1, 4)
+    assert uf.union(1, 4) and uf.is_tree()
+
+    edges = iter([(0, 1), (1, 2), (2, 0), (3, 4)])
+    uf = UnionFind(5)
+    assert not uf.add_edges(edges), "Expected the cycle 0-1-2 to be found"
+    assert next(edges) == (3, 4), "Expected add_edges to stop right after the cycle"
+
+    # A 10^6-vertex path is just a loop, no recursion involved
+    n = 10 ** 6
+    uf = UnionFind(n)
+    assert uf.add_edges((i, i + 1) for i in range(n - 1)) and uf.is_tree()
@@ -0,0 +1,467 @@
+"""
+The solvers from notes/backtracking.md on top of one iterative backtracking core.
+Every solver is a generator: solutions come out one at a time as they are found, so a caller that only needs the
+first one (or the first hundred) stops the search right there, and nothing recurses, so deep searches cannot hit the
+recursion limit. Which items / squares are already used is kept in an int bitmask instead of scanning the current path,
+and every solver takes an optional prune(path, choice) hook that can cut a branch before it is explored.
+Root-to-leaf paths of a tree are the same pattern again, see DFS.iter_find_all_paths.
+"""
+
+_DONE = object()  # marks an exhausted choice iterator
+
+
+def backtrack(choices, apply, undo, is_complete, solution, prune=None):
+    """
+    Generic depth-first backtracking with an explicit stack of choice iterators.
+    Starting from the current state, repeatedly take the next untried choice at the deepest level: apply it, yield
+    solution() if the state is now complete (a complete state is not extended further), otherwise open a new level.
+    When a level runs out of choices, the choice that opened it is undone, which is the backtracking step.
+    :param choices: choices() -> iterable of the choices available in the current state
+    :param apply: apply(choice) makes the choice
+    :param undo: undo(choice) takes the most recent choice back
+    :param is_complete: is_complete() -> True if the current state is a solution
+    :param solution: solution() -> the value to yield for the current state (copy anything that keeps changing)
+    :param prune: optional prune(choice) -> True to skip a choice without applying it
+    :return: generator of solutions
+    """
+    if is_complete():
+        yield solution()
+        return
+    stack = [iter(choices())]
+    taken = []
+    while stack:
+        choice = next(stack[-1], _DONE)
+        if choice is _DONE:
+            stack.pop()
+            if taken:
+                undo(taken.pop())
+            continue
+        if prune is not None and prune(choice):
+            continue
+        apply(choice)
+        if is_complete():
+            yield solution()
+            undo(choice)
+            continue
+        taken.append(choice)
+        stack.append(iter(choices()))
+
+
+def _path_prune(prune, path):
+    """Turn a solver's prune(path, choice) hook into the core's prune(choice)."""
+    return None if prune is None else (lambda choice: prune(path, choice))
+
+
+def permutations(items, prune=None):
+    """
+    Yield every ordering of items (positions are distinct, so equal items give repeated orderings, see anagrams).
+    Orderings come in the order of the item positions: [1, 2, 3], [1, 3, 2], [2, 1, 3], ...
+    :param items: sequence
+    :param prune: optional prune(path, item) -> True to not extend path with item
+    :return: generator of lists
+    """
+    n = len(items)
+    path = []
+    used = 0  # bit i set when items[i] is on the path
+
+    def choices():
+        return [i for i in range(n) if not used >> i & 1]
+
+    def apply(i):
+        nonlocal used
+        used |= 1 << i
+        path.append(items[i])
+
+    def undo(i):
+        nonlocal used
+        used &= ~(1 << i)
+        path.pop()
+
+    core_prune = None if prune is None else (lambda i: prune(path, items[i]))
+    return backtrack(choices, apply, undo, lambda: len(path) == n, lambda: path[:], core_prune)
+
+
+def combinations(items, k, prune=None):
+    """
+    Yield every choice of k items, keeping their order: combinations([1, 2, 3], 2) gives [1, 2], [1, 3], [2, 3].
+    A branch that can no longer reach k items (too few left after it) is never opened.
+    :param items: sequence
+    :param k: items per combination
+    :param prune: optional prune(path, item) -> True to not extend path with item
+    :return: generator of lists
+    """
+    n = len(items)
+    if not 0 <= k <= n:
+        return iter(())
+    path = []
+    indices = []
+
+    def choices():
+        start = indices[-1] + 1 if indices else 0
+        return range(start, n - (k - len(path)) + 1)
+
+    def apply(i):
+        indices.append(i)
+        path.append(items[i])
+
+    def undo(i):
+        indices.pop()
+        path.pop()
+
+    core_prune = None if prune is None else (lambda i: prune(path, items[i]))
+    return backtrack(choices, apply, undo, lambda: len(path) == k, lambda: path[:], core_prune)
+
+
+def anagrams(word, prune=None):
+    """
+    Yield every distinct rearrangement of word, each exactly once even when letters repeat ("aab" gives 3, not 6).
+    Instead of choosing a position of the word at each level we choose a letter out of the remaining letter counts,
+    so two equal letters are the same choice and duplicates are never generated in the first place. No slicing of
+    the remaining letters either: taking a letter is one count decrement.
+    Letters are tried in order of their first appearance in word.
+    :param word: str
+    :param prune: optional prune(path, letter) -> True to not extend the partial anagram (a list of letters) with letter
+    :return: generator of str
+    """
+    counts = {}
+    for letter in word:
+        counts[letter] = counts.get(letter, 0) + 1
+    letters = list(counts)
+    n = len(word)
+    path = []
+
+    def choices():
+        return [letter for letter in letters if counts[letter]]
+
+    def apply(letter):
+        counts[letter] -= 1
+        path.append(letter)
+
+    def undo(letter):
+        counts[letter] += 1
+        path.pop()
+
+    return backtrack(choices, apply, undo, lambda: len(path) == n, lambda: ''.join(path), _path_prune(prune, path))
+
+
+_TABLE_LIMIT = 2 ** 29  # bits of reachable-sum tables (64 MB) before falling back to bounds / meet in the middle
+
+
+def _sum_range(nums, target):
+    """
+    :return: (offset, span) so that every subset sum s of the integers nums satisfies 0 <= s + offset < span,
+    or None if nums and target are not all integers (the bit positions must be ints) or a table of (n + 1) * span
+    bits would exceed _TABLE_LIMIT
+    """
+    if type(target) is not int or not all(type(num) is int for num in nums):
+        return None
+    offset = -sum(num for num in nums if num < 0)
+    span = offset + sum(num for num in nums if num > 0) + 1
+    if (len(nums) + 1) * span > _TABLE_LIMIT:
+        return None
+    return offset, span
+
+
+def _reachable_sums(nums, offset):
+    """
+    reach[i] is a bitset (an int) of every sum some subset of nums[i:] makes: bit s + offset is set when s is reachable.
+    Adding nums[i] to every subset of nums[i + 1:] is one shift, so the whole table costs n big-int operations.
+    """
+    reach = [0] * (len(nums) + 1)
+    reach[-1] = 1 << offset
+    for i in reversed(range(len(nums))):
+        below = reach[i + 1]
+        reach[i] = below | (below << nums[i] if nums[i] >= 0 else below >> -nums[i])
+    return reach
+
+
+def _half_sums(nums):
+    """:return: sums[mask] is the sum of the nums picked by the bits of mask"""
+    sums = [0]
+    for num in nums:
+        sums += [total + num for total in sums]
+    return sums
+
+
+def _meet_in_the_middle(nums, target):
+    """
+    Split nums in two halves and list the 2^(n/2) subset sums of each: a subset sums to target exactly when its left
+    part sums to some s and its right part to target - s, so one dict lookup per right subset finds all its partners.
+    That is O(2^(n/2)) work instead of O(2^n), with no assumption about the numbers.
+    """
+    half = len(nums) // 2
+    left, right = nums[:half], nums[half:]
+    masks_by_sum = {}
+    for mask, total in enumerate(_half_sums(left)):
+        masks_by_sum.setdefault(total, []).append(mask)
+    for right_mask, total in enumerate(_half_sums(right)):
+        for left_mask in masks_by_sum.get(target - total, ()):
+            yield ([num for i, num in enumerate(left) if left_mask >> i & 1]
+                   + [num for i, num in enumerate(right) if right_mask >> i & 1])
+
+
+def _count_subsets(nums, target, method):
+    sum_range = _sum_range(nums, target) if method != 'meet_in_the_middle' else None
+    if sum_range is not None:
+        """
+        The number of subsets with sum s is the coefficient of x^s in (1 + x^nums[0]) * ... * (1 + x^nums[n-1]).
+        We keep that polynomial in one int, each coefficient in its own n + 1 bits (no count exceeds 2^n, so nothing
+        carries into the next one), which makes multiplying by (1 + x^num) a single shift and add: the same n big-int
+        operations as the reachable-sum table, counting instead of just marking.
+        """
+        offset, span = sum_range
+        if not 0 <= target + offset < span:
+            return 0
+        width = len(nums) + 1
+        counts = 1 << (offset * width)
+        for num in nums:
+            counts += counts << (num * width) if num >= 0 else counts >> (-num * width)
+        return counts >> ((target + offset) * width) & ((1 << width) - 1)
+    half = len(nums) // 2
+    left_counts = {}
+    for total in _half_sums(nums[:half]):
+        left_counts[total] = left_counts.get(total, 0) + 1
+    return sum(left_counts.get(target - total, 0) for total in _half_sums(nums[half:]))
+
+
+def subset_sum(nums, target, prune=None, method='auto', count_only=False):
+    """
+    Yield every subset of nums (as a list, in the order of nums) that sums to target. Negative numbers are fine.
+    The backtracking search decides for one number after the other whether it is in the subset, and only opens a
+    branch that can still reach target with the numbers after it:
+    - for integers (target included) it checks a precomputed table of the sums every suffix of nums can make (see _reachable_sums), so
+      every branch it opens ends in a solution and the work is proportional to the output;
+    - otherwise it checks that target lies between the sums of the negative and of the positive numbers left.
+    method='meet_in_the_middle' lists the sums of both halves instead, O(2^(n/2)) whatever the numbers are, which is
+    the better choice for about 40 numbers with a huge range of sums. 'auto' uses the table when it fits in memory
+    and meet in the middle otherwise. Meet in the middle yields the subsets in a different order.
+    :param nums: sequence of numbers
+    :param target:
+    :param prune: optional prune(path, num) -> True to not add num to path (backtracking only)
+    :param method: 'auto', 'backtrack' or 'meet_in_the_middle'
+    :param count_only: return the number of subsets instead, without listing any of them: for integers whose table
+    fits from a generating function in n big-int operations, by meet in the middle otherwise
+    :return: generator of lists, or an int with count_only
+    """
+    if method not in ('auto', 'backtrack', 'meet_in_the_middle'):
+        raise ValueError(f"unknown method {method!r}, expected 'auto', 'backtrack' or 'meet_in_the_middle'")
+    sum_range = _sum_range(nums, target)
+    if method == 'auto':
+        method = 'backtrack' if sum_range is not None else 'meet_in_the_middle'
+    if prune is not None and (method != 'backtrack' or count_only):
+        raise ValueError("prune only works with the backtracking search")
+    if count_only:
+        return _count_subsets(nums, target, method)
+    if method == 'meet_in_the_middle':
+        return _meet_in_the_middle(list(nums), target)
+
+    n = len(nums)
+    if sum_range is not None:
+        offset = sum_range[0]
+        reach = _reachable_sums(nums, offset)
+
+        def can_reach(i, remaining):
+            return 0 <= remaining + offset and reach[i] >> (remaining + offset) & 1
+    else:
+        lows, highs = [0] * (n + 1), [0] * (n + 1)  # sums of the negative / positive numbers from i on
+        for i in reversed(range(n)):
+            lows[i] = lows[i + 1] + min(nums[i], 0)
+            highs[i] = highs[i + 1] + max(nums[i], 0)
+
+        def can_reach(i, remaining):
+            return lows[i] <= remaining <= highs[i]
+
+    if not can_reach(0, target):
+        return iter(())
+    path = []
+    taken = []  # True / False per decided number
+    total = 0
+
+    def choices():
+        i = len(taken)
+        options = []
+        if can_reach(i + 1, target - total - nums[i]):
+            options.append(True)
+        if can_reach(i + 1, target - total):
+            options.append(False)
+        return options
+
+    def apply(take):
+        nonlocal total
+        if take:
+            path.append(nums[len(taken)])
+            total += path[-1]
+        taken.append(take)
+
+    def undo(take):
+        nonlocal total
+        if taken.pop():
+            total -= path.pop()
+
+    core_prune = None if prune is None else (lambda take: take and prune(path, nums[len(taken)]))
+    return backtrack(choices, apply, undo, lambda: len(taken) == n, lambda: path[:], core_prune)
+
+
+_KNIGHT_MOVES = ((2, 1), (1, 2), (-1, 2), (-2, 1), (-2, -1), (-1, -2), (1, -2), (2, -1))
+
+
+def knights_tours(start=(0, 0), board_size=8, warnsdorff=True, prune=None):
+    """
+    Yield knight's tours: paths of (x, y) squares starting at start that visit every square of the board once.
+    The visited squares are one bit each in an int, and the knight moves of every square are computed once up front.
+    With warnsdorff=True the moves are tried in order of Warnsdorff's rule, fewest onward moves first (ties keep the
+    move order), which finds a tour of an 8x8 board almost without backtracking; plain move order can take hours.
+    :param start: (x, y) starting square
+    :param board_size: squares per side
+    :param warnsdorff: order moves by Warnsdorff's rule
+    :param prune: optional prune(path, square) -> True to not move to square
+    :return: generator of lists of (x, y)
+    """
+    squares = board_size * board_size
+    x, y = start
+    if not (0 <= x < board_size and 0 <= y < board_size):
+        raise ValueError(f"start {start} is off the {board_size}x{board_size} board")
+    moves = [[(x + dx) * board_size + (y + dy) for dx, dy in _KNIGHT_MOVES
+              if 0 <= x + dx < board_size and 0 <= y + dy < board_size]
+             for x in range(board_size) for y in range(board_size)]
+    squares_taken = [x * board_size + y]
+    path = [start]
+    visited = 1 << squares_taken[0]
+
+    def onward(square):
+        return sum(1 for target in moves[square] if not visited >> target & 1)
+
+    def choices():
+        free = [target for target in moves[squares_taken[-1]] if not visited >> target & 1]
+        if warnsdorff:
+            free.sort(key=onward)
+        return free
+
+    def apply(square):
+        nonlocal visited
+        visited |= 1 << square
+        squares_taken.append(square)
+        path.append(divmod(square, board_size))
+
+    def undo(square):
+        nonlocal visited
+        visited &= ~(1 << square)
+        squares_taken.pop()
+        path.pop()
+
+    core_prune = None if prune is None else (lambda square: prune(path, divmod(square, board_size)))
+    return backtrack(choices, apply, undo, lambda: len(path) == squares, lambda: path[:], core_prune)
+
+
+_MAZE_MOVES = ((0, 1), (1, 0), (0, -1), (-1, 0))  # right, down, left, up
+
+
+def maze_paths(maze, start=(0, 0), end=None, prune=None):
+    """
+    Yield every simple path of (x, y) cells from start to end (default: the bottom-right cell) through open cells
+    (0 is open, anything else a wall), trying right, down, left, up in that order.
+    The cells on the current path are one bit each in an int, so checking a move is O(1) instead of a scan of the path.
+    :param maze: list of rows
+    :param start: (x, y)
+    :param end: (x, y), defaults to (len(maze) - 1, len(maze[0]) - 1)
+    :param prune: optional prune(path, cell) -> True to not step into cell
+    :return: generator of lists of (x, y)
+    """
+    rows, columns = len(maze), len(maze[0]) if maze else 0
+    if end is None:
+        end = (rows - 1, columns - 1)
+
+    def is_open(x, y):
+        return 0 <= x < rows and 0 <= y < columns and maze[x][y] == 0
+
+    if not is_open(*start) or not is_open(*end):
+        return iter(())
+    path = [start]
+    visited = 1 << (start[0] * columns + start[1])
+
+    def choices():
+        x, y = path[-1]
+        return [(x + dx, y + dy) for dx, dy in _MAZE_MOVES
+                if is_open(x + dx, y + dy) and not visited >> ((x + dx) * columns + y + dy) & 1]
+
+    def apply(cell):
+        nonlocal visited
+        visited |= 1 << (cell[0] * columns + cell[1])
+        path.append(cell)
+
+    def undo(cell):
+        nonlocal visited
+        visited &= ~(1 << (cell[0] * columns + cell[1]))
+        path.pop()
+
+    return backtrack(choices, apply, undo, lambda: path[-1] == end, lambda: path[:], _path_prune(prune, path))
+
+
+if __name__ == "__main__":
+    import itertools
+    import random
+
+    assert list(permutations([1, 2, 3])) == [[1, 2, 3], [1, 3, 2], [2, 1, 3], [2, 3, 1], [3, 1, 2], [3, 2, 1]]
+    assert list(permutations([])) == [[]]
+    assert list(combinations([1, 2, 3], 2)) == [[1, 2], [1, 3], [2, 3]]
+    assert list(combinations(range(6), 3)) == [list(c) for c in itertools.combinations(range(6), 3)]
+    assert list(combinations([1, 2], 3)) == []
+    # prune: no two consecutive numbers next to each other
+    result = list(permutations([1, 2, 3, 4], prune=lambda path, item: bool(path) and abs(path[-1] - item) == 1))
+    assert result == [[2, 4, 1, 3], [3, 1, 4, 2]], f"Expected [[2, 4, 1, 3], [3, 1, 4, 2]], but got {result}"
+
+    assert sorted(anagrams('cat')) == sorted(['cat', 'cta', 'act', 'atc', 'tca', 'tac'])
+    assert sorted(anagrams('aab')) == ['aab', 'aba', 'baa']
+    mississippi = list(anagrams('mississippi'))
+    assert len(mississippi) == len(set(mississippi)) == 34650, f"Expected 11!/(4!4!2!) = 34650, got {len(mississippi)}"
+
+    assert list(subset_sum([1, 2, 3, 4, 5], 7)) == [[1, 2, 4], [2, 5], [3, 4]]
+    assert list(subset_sum([3, -1, 2, -2], 1)) == [[3, -2], [-1, 2]]
+    assert list(subset_sum([0, 1], 1)) == [[0, 1], [1]] and list(subset_sum([1, 2], 0)) == [[]]
+    assert list(subset_sum([0.5, 1.5, -1.0], 1.0)) == [[0.5, 1.5, -1.0]]  # no table for floats: meet in the middle
+    # Integer numbers with a float target cannot use the table either
+    assert sorted(subset_sum([1, 2, 3], 3.0)) == [[1, 2], [3]] and list(subset_sum([], 0.0)) == [[]]
+    assert subset_sum([1, 2, 3], 3.0, count_only=True) == 2
+    assert list(subset_sum([1, 2, 3], 3.0, method='backtrack')) == [[1, 2], [3]]
+    assert sorted(subset_sum([1, 2, 3, 4, 5], 7, method='meet_in_the_middle')) == [[1, 2, 4], [2, 5], [3, 4]]
+    assert list(subset_sum([1, 2, 3, 4, 5], 7, prune=lambda path, num: num == 4)) == [[2, 5]]
+    # Brute force over every subset agrees, negatives included
+    rng = random.Random(5)
+    for _ in range(50):
+        nums = [rng.randint(-9, 9) for _ in range(rng.randint(0, 12))]
+        target = rng.randint(-15, 15)
+        expected = sorted(subset for k in range(len(nums) + 1)
+                          for subset in map(list, itertools.combinations(nums, k)) if sum(subset) == target)
+        for method in ('backtrack', 'meet_in_the_middle'):
+            assert sorted(subset_sum(nums, target, method=method)) == expected, (nums, target, method)
+            assert subset_sum(nums, target, method=method, count_only=True) == len(expected), (nums, target, method)
+    # Floats with method='backtrack' run the search pruned by the suffix bounds
+    for _ in range(50):
+        nums = [rng.randint(-8, 8) / 4 for _ in range(rng.randint(0, 10))]
+        target = rng.randint(-12, 12) / 4
+        expected = sorted(subset for k in range(len(nums) + 1)
+                          for subset in map(list, itertools.combinations(nums, k)) if sum(subset) == target)
+        assert sorted(subset_sum(nums, target, method='backtrack')) == expected, (nums, target)
+    # 60 numbers: the table keeps the search proportional to its few solutions, counting needs no search at all
+    nums = [rng.randrange(10 ** 3, 10 ** 4) for _ in range(60)]
+    assert len(list(subset_sum(nums, 20000))) == subset_sum(nums, 20000, count_only=True) > 0
+    assert subset_sum([1] * 60, 30, count_only=True) == 118264581564861424  # 60 choose 30
+
+    tour = next(knights_tours((0, 0)))
+    assert len(tour) == 64 and len(set(tour)) == 64
+    assert all(sorted((abs(a[0] - b[0]), abs(a[1] - b[1]))) == [1, 2] for a, b in zip(tour, tour[1:]))
+    assert list(knights_tours((0, 0), board_size=4)) == []  # no tour exists on a 4x4 board
+    assert len(next(knights_tours((0, 0), board_size=5, warnsdorff=False))) == 25
+
+    maze = [
+        [0, 0, 1, 0],
+        [1, 0, 0, 0],
+        [0, 0, 1, 0],
+        [0, 1, 0, 0]
+    ]
+    paths = list(maze_paths(maze))
+    assert paths == [[(0, 0), (0, 1), (1, 1), (1, 2), (1, 3), (2, 3), (3, 3)]], f"Expected one path, but got {paths}"
+    maze[2][2] = 0  # connects the two corridors, 7 simple paths
+    paths = list(maze_paths(maze))
+    assert len(paths) == len(set(map(tuple, paths))) == 7 and all(len(path) == len(set(path)) and path[-1] == (3, 3) for path in paths)
+    assert len(list(maze_paths(maze, prune=lambda path, cell: cell == (1, 2)))) == 2
@@ -0,0 +1,331 @@
+"""
+Timing helpers for the depth_first_search package. Run `python benchmarks.py` from this directory.
+
+`python benchmarks.py suite` runs every DFS method over seeded tree / graph families (see FAMILIES and METHODS) and
+reports throughput and peak memory per method. `--save FILE` stores the numbers as a JSON baseline and
+`--compare FILE` flags every method that got slower or hungrier than its baseline, exiting with status 1 if any did:
+
+    python benchmarks.py suite --sizes 1000 100000 --save baseline.json
+    python benchmarks.py suite --sizes 1000 100000 --compare baseline.json
+
+Sizes up to 10^7 work, but a Python node costs a few hundred bytes, so such a tree needs several GB of memory.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from Node import Node
+from BinarySearchTreeNode import BinarySearchTreeNode
+from dfs import DFS
+import graph
+
+
+def timed(func, *args):
+    """:return: (result, seconds) of one call"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def hub_edges(degree, duplicates=0.1, seed=0):
+    """Edges of a star: node 0 linked to `degree` leaves, with a share of the edges repeated in random places."""
+    rng = random.Random(seed)
+    edges = [(0, leaf) for leaf in range(1, degree + 1)]
+    edges.extend(rng.choices(edges, k=int(degree * duplicates)))
+    rng.shuffle(edges)
+    return edges
+
+
+def load_with_add_neighbor(edges):
+    """The old way: one add_neighbor call per edge."""
+    nodes = {}
+    for u, v in edges:
+        if u not in nodes:
+            nodes[u] = Node(u)
+        if v not in nodes:
+            nodes[v] = Node(v)
+        nodes[u].add_neighbor(nodes[v])
+    return nodes
+
+
+def bench_edge_loading(degrees=(10 ** 3, 10 ** 4, 3 * 10 ** 4)):
+    for degree in degrees:
+        edges = hub_edges(degree)
+        old, old_seconds = timed(load_with_add_neighbor, edges)
+        new, new_seconds = timed(Node.from_edges, edges)
+        assert [n.value for n in old[0].neighbors] == [n.value for n in new[0].neighbors]
+        print(f"hub degree {degree:>7}: add_neighbor {old_seconds:8.3f}s  from_edges {new_seconds:8.3f}s")
+
+
+def balanced_bst(n):
+    """BST over the keys 0..n-1 with minimal height, linked through add_child so neighbors match left / right."""
+    root = BinarySearchTreeNode((n - 1) // 2)
+    stack = [(root, 0, n - 1)]
+    while stack:
+        node, low, high = stack.pop()
+        middle = node.value
+        for child_low, child_high in ((low, middle - 1), (middle + 1, high)):
+            if child_low <= child_high:
+                child = BinarySearchTreeNode((child_low + child_high) // 2)
+                node.add_child(child)
+                stack.append((child, child_low, child_high))
+    return root
+
+
+def bench_analyze(n=10 ** 6):
+    dfs = DFS()
+    root = balanced_bst(n)
+
+    def one_by_one(root):
+        return (dfs.recursive_sum_of_nodes(root), dfs.recursive_max_node(root), dfs.recursive_max_depth_of_tree(root),
+                dfs.calculate_tilt(root), dfs.max_diameter(root), dfs.max_universal_value_path(root))
+
+    separate, separate_seconds = timed(one_by_one, root)
+    fused, fused_seconds = timed(dfs.analyze, root)
+    assert tuple(fused) == separate
+    print(f"{n} nodes: six methods {separate_seconds:.3f}s  analyze {fused_seconds:.3f}s  "
+          f"({separate_seconds / fused_seconds:.1f}x)")
+
+
+def bench_parallel(forest_size=2000, tree_size=500, big_tree_size=10 ** 6):
+    from CompactTree import CompactTree
+    from parallel import analyze_forest, analyze_parallel
+
+    dfs = DFS()
+    forest = [CompactTree.from_node(balanced_bst(tree_size)) for _ in range(forest_size)]
+    serial, serial_seconds = timed(lambda trees: [dfs.analyze(tree) for tree in trees], forest)
+    pooled, pooled_seconds = timed(analyze_forest, forest)
+    assert serial == pooled
+    print(f"forest of {forest_size} x {tree_size}: serial {serial_seconds:.3f}s  process pool {pooled_seconds:.3f}s")
+
+    tree = CompactTree.from_node(balanced_bst(big_tree_size))
+    serial, serial_seconds = timed(dfs.analyze, tree)
+    pooled, pooled_seconds = timed(analyze_parallel, tree)
+    assert serial == pooled
+    print(f"one tree of {big_tree_size}: serial {serial_seconds:.3f}s  process pool {pooled_seconds:.3f}s")
+
+
+def bench_bst_index(n=10 ** 6, seed=0):
+    from BinarySearchTree import BinarySearchTree
+
+    rng = random.Random(seed)
+    keys = list(range(n))
+    tree, seconds = timed(BinarySearchTree.from_sorted, keys, True)
+    print(f"{n} keys: from_sorted {seconds:.3f}s (height {tree.height()})")
+
+    shuffled = keys[:]
+    rng.shuffle(shuffled)
+    for balanced in (False, True):
+        tree = BinarySearchTree(balanced)
+        _, insert_seconds = timed(lambda ks: [tree.insert(k) for k in ks], shuffled)
+        _, search_seconds = timed(lambda ks: [tree.search(k) for k in ks], shuffled)
+        _, range_seconds = timed(lambda: sum(1 for _ in tree.range(n // 4, n // 2)))
+        _, delete_seconds = timed(lambda ks: [tree.delete(k) for k in ks], shuffled[:n // 2])
+        print(f"{n} random keys, balanced={balanced}: insert {insert_seconds:.3f}s  search {search_seconds:.3f}s  "
+              f"range {range_seconds:.3f}s  delete half {delete_seconds:.3f}s")
+
+    # Sorted inserts: a chain without balancing, so keep this one small
+    small = keys[:n // 100]
+    for balanced in (False, True):
+        tree = BinarySearchTree(balanced)
+        _, seconds = timed(lambda ks: [tree.insert(k) for k in ks], small)
+        print(f"{len(small)} sorted inserts, balanced={balanced}: {seconds:.3f}s (height {tree.height()})")
+
+
+def degenerate_bst(n):
+    """BST over the keys 0..n-1 inserted in sorted order: every node is its parent's right child, a linked list."""
+    root = node = BinarySearchTreeNode(0)
+    for key in range(1, n):
+        child = BinarySearchTreeNode(key)
+        node.add_right(child)
+        node = child
+    return root
+
+
+def random_bst(n, seed=0):
+    """BST over the keys 0..n-1 inserted in a seeded random order, expected height about 3 log2(n)."""
+    from BinarySearchTree import BinarySearchTree
+
+    keys = list(range(n))
+    random.Random(seed).shuffle(keys)
+    tree = BinarySearchTree()
+    for key in keys:
+        tree.insert(key)
+    return tree.root
+
+
+def star(n):
+    """Node 0 with n - 1 leaves, the widest possible tree."""
+    root = Node(0)
+    root.add_neighbors([Node(value) for value in range(1, n)])
+    return root
+
+
+def cyclic_graph(n, extra_edges=1, seed=0):
+    """
+    A random tree over n nodes plus `extra_edges` random edges per node, so the graph is full of cycles and shared
+    nodes. Values are strings so recursive_dfs can join them.
+    """
+    rng = random.Random(seed)
+    edges = [(rng.randrange(v), v) for v in range(1, n)]
+    edges.extend((rng.randrange(n), rng.randrange(n)) for _ in range(extra_edges * n))
+    nodes = Node.from_edges((str(u), str(v)) for u, v in edges)
+    return nodes["0"]
+
+
+# name -> (builder(n, seed), kind): "binary" trees get every method, "general" trees the ones that follow neighbors,
+# and "cyclic" graphs only the ones that keep a visited set
+FAMILIES = {
+    'balanced': (lambda n, seed: balanced_bst(n), 'binary'),
+    'degenerate': (lambda n, seed: degenerate_bst(n), 'binary'),
+    'random': (random_bst, 'binary'),
+    'star': (lambda n, seed: star(n), 'general'),
+    'cyclic': (cyclic_graph, 'cyclic'),
+}
+
+
+def _drain(iterable):
+    for _ in iterable:
+        pass
+
+
+# name -> (call(dfs, root), kinds it runs on)
+_GENERAL = ('binary', 'general')
+METHODS = {
+    'recursive_dfs': (lambda dfs, root: dfs.recursive_dfs(root), ('cyclic',)),
+    'iter_dfs': (lambda dfs, root: _drain(dfs.iter_dfs(root)), ('binary', 'general', 'cyclic')),
+    'recursive_sum_of_nodes': (lambda dfs, root: dfs.recursive_sum_of_nodes(root), _GENERAL),
+    'recursive_max_node': (lambda dfs, root: dfs.recursive_max_node(root), _GENERAL),
+    'recursive_max_depth_of_tree': (lambda dfs, root: dfs.recursive_max_depth_of_tree(root), _GENERAL),
+    'recursive_max_depth_path': (lambda dfs, root: dfs.recursive_max_depth_path(root), _GENERAL),
+    'recursive_find_all_paths': (lambda dfs, root: dfs.recursive_find_all_paths(root), _GENERAL),
+    'recursive_path_sum': (lambda dfs, root: dfs.recursive_path_sum(root, 0), _GENERAL),
+    'iter_find_all_paths': (lambda dfs, root: _drain(dfs.iter_find_all_paths(root)), _GENERAL),
+    'iter_max_depth_path': (lambda dfs, root: _drain(dfs.iter_max_depth_path(root)), _GENERAL),
+    'iter_path_sum': (lambda dfs, root: _drain(dfs.iter_path_sum(root, 0)), _GENERAL),
+    'path_sum_count': (lambda dfs, root: dfs.path_sum_count(root, 0, any_start=True), _GENERAL),
+    'batch_path_sum': (lambda dfs, root: dfs.batch_path_sum(root, range(8), any_start=True, count_only=True),
+                       _GENERAL),
+    'shared_find_all_paths': (lambda dfs, root: dfs.shared_find_all_paths(root), _GENERAL),
+    'shared_max_depth_path': (lambda dfs, root: dfs.shared_max_depth_path(root), _GENERAL),
+    'shared_path_sum': (lambda dfs, root: dfs.shared_path_sum(root, 0), _GENERAL),
+    'recursive_binary_search_tree': (lambda dfs, root: dfs.recursive_binary_search_tree(root), ('binary',)),
+    'iter_in_order': (lambda dfs, root: _drain(dfs.iter_in_order(root)), ('binary',)),
+    'is_valid_bst': (lambda dfs, root: dfs.is_valid_bst(root), ('binary',)),
+    'calculate_tilt': (lambda dfs, root: dfs.calculate_tilt(root), ('binary',)),
+    'max_diameter': (lambda dfs, root: dfs.max_diameter(root), ('binary',)),
+    'max_unique_value_path': (lambda dfs, root: dfs.max_unique_value_path(root), ('binary',)),
+    'max_unique_value_path_another_way': (lambda dfs, root: dfs.max_unique_value_path_another_way(root),
+                                          ('binary',)),
+    'max_universal_value_path': (lambda dfs, root: dfs.max_universal_value_path(root), ('binary',)),
+    'analyze': (lambda dfs, root: dfs.analyze(root), ('binary',)),
+    'strongly_connected_components': (lambda dfs, root: graph.strongly_connected_components(root), ('cyclic',)),
+    'find_cycle': (lambda dfs, root: graph.find_cycle(root), ('cyclic',)),
+    'condensation': (lambda dfs, root: graph.condensation(root), ('cyclic',)),
+}
+
+
+def measure(call, dfs, root, repeat=3):
+    """
+    :return: (best seconds of `repeat` calls, peak bytes allocated during one more call under tracemalloc)
+    The memory run is separate because tracemalloc slows every allocation down several times.
+    """
+    seconds = min(timed(call, dfs, root)[1] for _ in range(repeat))
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        call(dfs, root)
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def run_suite(sizes=(10 ** 3, 10 ** 4, 10 ** 5), families=tuple(FAMILIES), methods=tuple(METHODS), seed=0,
+              repeat=3, out=sys.stdout):
+    """
+    Run every method that applies to each family at each size.
+    :return: dict "family/size/method" -> {"nodes_per_second": ..., "peak_bytes": ...}
+    """
+    dfs = DFS()
+    results = {}
+    for family in families:
+        builder, kind = FAMILIES[family]
+        for n in sizes:
+            root = builder(n, seed)
+            for method in methods:
+                call, kinds = METHODS[method]
+                if kind not in kinds:
+                    continue
+                seconds, peak = measure(call, dfs, root, repeat)
+                key = f"{family}/{n}/{method}"
+                results[key] = {'nodes_per_second': n / seconds if seconds else float('inf'), 'peak_bytes': peak}
+                print(f"{key:<60} {n / seconds if seconds else float('inf'):>14,.0f} nodes/s "
+                      f"{peak / 2 ** 20:>10.2f} MiB peak", file=out)
+            del root
+    return results
+
+
+def find_regressions(results, baseline, time_tolerance=0.3, memory_tolerance=0.1, memory_slack=64 * 1024):
+    """
+    Compare suite results with a baseline from an earlier run; entries missing on either side are ignored.
+    Timing is noisy, so throughput only counts as a regression when it drops by more than time_tolerance. Peak memory
+    is nearly deterministic and gets the tighter memory_tolerance, plus memory_slack bytes so tiny inputs do not
+    trip over allocator noise.
+    :return: list of human-readable regression messages, empty if everything is within tolerance
+    """
+    regressions = []
+    for key in sorted(results.keys() & baseline.keys()):
+        now, then = results[key], baseline[key]
+        if now['nodes_per_second'] < then['nodes_per_second'] * (1 - time_tolerance):
+            regressions.append(f"{key}: {now['nodes_per_second']:,.0f} nodes/s, "
+                               f"baseline {then['nodes_per_second']:,.0f} nodes/s")
+        if now['peak_bytes'] > then['peak_bytes'] * (1 + memory_tolerance) + memory_slack:
+            regressions.append(f"{key}: peak {now['peak_bytes']:,} bytes, baseline {then['peak_bytes']:,} bytes")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command')
+    suite = commands.add_parser('suite', help="run every DFS method over the synthetic families")
+    suite.add_argument('--sizes', type=int, nargs='+', default=[10 ** 3, 10 ** 4, 10 ** 5])
+    suite.add_argument('--families', nargs='+', choices=list(FAMILIES), default=list(FAMILIES))
+    suite.add_argument('--methods', nargs='+', choices=list(METHODS), default=list(METHODS))
+    suite.add_argument('--seed', type=int, default=0)
+    suite.add_argument('--repeat', type=int, default=3, help="timed calls per method, the best one counts")
+    suite.add_argument('--save', metavar='FILE', help="write the results as a JSON baseline")
+    suite.add_argument('--compare', metavar='FILE', help="flag regressions against a saved baseline")
+    suite.add_argument('--time-tolerance', type=float, default=0.3)
+    suite.add_argument('--memory-tolerance', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        bench_edge_loading()
+        bench_analyze()
+        bench_parallel()
+        bench_bst_index()
+        return 0
+
+    results = run_suite(args.sizes, args.families, args.methods, args.seed, args.repeat)
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.time_tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,123 +1,241 @@
+from CachedBinarySearchTreeNode import CachedBinarySearchTreeNode
+from CompactTree import CompactTree
+from FrozenNode import FrozenNode, subtree_metric
+from PathTrie import PathTrie, NO_PARENT
+from tracing import traced, backtrack, descend
+from UnionFind import UnionFind
+
+from collections import namedtuple
+
+_ROOT_START = (0,)  # start depths of a path that begins at the root
+
+METRICS = ('sum', 'max', 'depth', 'tilt', 'diameter', 'universal_path')
+# Result of DFS.analyze, metrics that were not asked for stay None
+TreeAnalysis = namedtuple('TreeAnalysis', METRICS, defaults=(None,) * len(METRICS))
+
+
 class DFS:
+    """
+    Every traversal below keeps its own explicit stack (a plain Python list) instead of recursing.
+    A recursive DFS pushes one interpreter call frame per tree level, so a degenerate tree (e.g. a BST built from
+    sorted keys) raises RecursionError after ~1000 levels. An explicit stack only grows a list, so the depth of the
+    tree is limited by memory, and we also skip the per-node cost of a Python function call.
+    The "recursive_" method names are kept so existing callers do not break.
+    The traversal and aggregate methods (everything except the unique-value paths and valid_tree) also accept a
+    CompactTree as root and then run over its arrays without touching any node objects.
+    Sum, max, depth and tilt of a CachedBinarySearchTreeNode are read from its cached subtree aggregates in O(1).
+    The aggregates of a FrozenNode tree (see freeze) are computed once per distinct subtree and memoized.
+    A tracer (see tracing.py) passed to the constructor is told about every call and every node visited, backtracked
+    out of or pruned, e.g. TraversalStats to count them.
+    """
+
+    def __init__(self, tracer=None):
+        self.tracer = tracer
+
+    @traced
     def recursive_dfs(self, root):
         """
         Depth-First Search visits every node in a binary tree by going "down" as far as possible before backtracking to visit the nodes on the next path.
         Depth-First Search is typically implemented as a recursive function. It visits new nodes in the tree by making recursive calls. When a recursive call is made, a new call frame is pushed onto the call stack.
         Backtracking occurs whenever a recursive call returns. The call frame is popped off the call stack, and execution returns to the next call frame on the call stack.
+        The visit order comes from iter_dfs, and the values are joined once at the end, so building the string is linear
+        in its length.
         :param root:
         :return:
         """
-        if root is None or root.visited:
-            return ""
-        result = root.value
-        for neighor in root.neighbors:
-            result = "->".join([result, self.recursive_dfs(neighor)])
-        return result
+        if isinstance(root, CompactTree):
+            return root.dfs()
+        return "->".join(node.value for node in self.iter_dfs(root))
 
+    @traced
+    def iter_dfs(self, root, visited=None):
+        """
+        Yield every node reachable from root once, in depth-first pre-order.
+        Which nodes have been seen is kept in a set owned by this call (keyed by id(node)) instead of a flag on the
+        nodes, so nothing needs resetting afterwards, cycles and shared nodes are handled, and any number of threads
+        can walk the same graph at the same time because the nodes are only read.
+        A node can sit on the stack more than once (pushed by two parents); it is skipped when popped the second time,
+        which gives exactly the order a recursive DFS that marks nodes on entry would produce.
+        A FrozenNode tree (see freeze) is walked without a visited set when none is given: hash-consing makes every
+        copy of a repeated subtree the same object, so skipping seen nodes would drop the copies. Frozen trees have no
+        cycles, and the walk yields the nodes in the order of the tree that was frozen, repeated subtrees included.
+        :param root:
+        :param visited: optional set of id(node) to share between calls, e.g. to walk several roots of one graph
+        :return: generator of nodes
+        """
+        tracer = self.tracer
+        if visited is None and isinstance(root, FrozenNode):
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                if tracer is not None:
+                    tracer.enter(node, len(stack))
+                yield node
+                stack.extend(child for child in reversed(node.neighbors) if child is not None)
+            return
+        if visited is None:
+            visited = set()
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if id(node) in visited:
+                if tracer is not None:
+                    tracer.prune(node)
+                continue
+            visited.add(id(node))
+            if tracer is not None:
+                tracer.enter(node, len(stack))
+            yield node
+            stack.extend(reversed(node.neighbors))
+
+    @traced
     def recursive_sum_of_nodes(self, root):
         """
         :param root:
         :return: the sum of all nodes in a tree
         """
-        if root is None:
-            return 0
-        total = root.value
-        for neighbor in root.neighbors:
-            total += self.recursive_sum_of_nodes(neighbor)
+        if isinstance(root, CompactTree):
+            return root.sum_of_nodes()
+        if isinstance(root, CachedBinarySearchTreeNode):
+            return root.subtree_sum
+        if isinstance(root, FrozenNode):
+            return subtree_metric(root, 'sum')
+        tracer = self.tracer
+        total = 0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if tracer is not None:
+                tracer.enter(node, len(stack))
+            total += node.value
+            stack.extend(node.neighbors)
         return total
 
+    @traced
     def recursive_max_node(self, root):
         """
         :param root:
         :return: the maximum value of all nodes in a tree
         """
-        if root is None:
-            # Remember to return correct type
-            return float('-inf')
-        max_value = root.value
-        for neighbor in root.neighbors:
-            max_value = max(max_value, self.recursive_max_node(neighbor))
+        if isinstance(root, CompactTree):
+            return root.max_node()
+        if isinstance(root, CachedBinarySearchTreeNode):
+            return root.subtree_max
+        if isinstance(root, FrozenNode):
+            return subtree_metric(root, 'max')
+        # Remember to return correct type
+        tracer = self.tracer
+        max_value = float('-inf')
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if tracer is not None:
+                tracer.enter(node, len(stack))
+            if node.value > max_value:
+                max_value = node.value
+            stack.extend(node.neighbors)
         return max_value
 
+    @traced
     def recursive_max_depth_of_tree(self, root):
         """
         :return: max depth of the tree
         """
+        if isinstance(root, CompactTree):
+            return root.max_depth()
+        if isinstance(root, CachedBinarySearchTreeNode):
+            # Both neighbor slots of a BinarySearchTreeNode count as a level even when empty (see below),
+            # so this depth is one more than the edges down to the deepest leaf.
+            return root.height + 1
+        if isinstance(root, FrozenNode):
+            return subtree_metric(root, 'depth')
         if root is None:
             return 0
+        tracer = self.tracer
+        trail = []
         depth = 0
-        for neighbor in root.neighbors:
-            depth = max(depth, 1 + self.recursive_max_depth_of_tree(neighbor))
+        stack = [(root, 0)]
+        while stack:
+            node, node_depth = stack.pop()
+            if tracer is not None:
+                descend(tracer, trail, node_depth, node, len(stack))
+            for neighbor in node.neighbors:
+                # Every neighbor slot counts one level, even an empty (None) one, same as the recursive version did.
+                if node_depth + 1 > depth:
+                    depth = node_depth + 1
+                if neighbor is not None:
+                    stack.append((neighbor, node_depth + 1))
+        if tracer is not None:
+            backtrack(tracer, trail, 0)
         return depth
 
+    @traced
     def recursive_max_depth_path(self, root, current_path=None, max_paths=None, current_depth=0, max_depth=None):
         """
-        This function finds the maximum depth path in a tree using recursion.
+        This function finds the maximum depth path in a tree using an explicit stack.
         :param root:
         :param current_path: List of path values being explored
         :param max_path: List of path values that has the maximum depth found so far
         :param current_depth: Current depth of the path being explored
-        :param max_depth: Max depth found so far, stored as a list to allow modification within the recursive calls
+        :param max_depth: Max depth found so far, stored as a list so the caller can read it back after the call
         :return: List of all nodes in the maximum depth path
         """
+        if isinstance(root, CompactTree):
+            return root.max_depth_paths()
         # Initialize variables if they are None
         if current_path is None:
             current_path = []
         if max_paths is None:
             max_paths = []
         if max_depth is None:
-            """
-            Why do we use a list for max_depth?
-            In recursive functions in Python, integers are immutable. 
-            When passed as arguments, any changes made to an integer variable within recursive calls won't affect the original value in the parent calls.
-            By using a list (which is mutable), changes to the max_depth value persist across recursive calls. 
-            """
             max_depth = [0]
 
         if root is None:
             return max_paths
 
-        current_path.append(root.value)
-        current_depth += 1  # current_depth=1
-
-        if current_depth > max_depth[0]:
-            """
-            Why do we use an integer for current_depth?
-            There's an important distinction between current_depth and max_depth in the recursive function:
-            1. current_depth is used to track the depth of the current path being explored. 
-               When we pass it to recursive calls, we don't need the modified value to persist back to parent calls. 
-               Each recursive call works with its own current_depth value independently.
-            2. max_depth needs to be shared and updated across all recursive calls because it represents the maximum depth found so far in the entire tree. 
-               Changes to this value need to be visible to all recursive calls.
-            """
-            max_depth[0] = current_depth
-            max_paths.clear()  # clear previous max paths if found deeper path
-            max_paths.append(current_path[:])  # Add a copy of current_path to max_paths. We use current_path[:] to create a shallow copy of the list. If we use current_path directly, we would be appending a reference to the same list object, which would change as we backtrack and modify current_path in subsequent recursive calls.
-            # max_paths.append vs max_paths.extend - append adds a single element (a list in this case) to max_paths, while extend would add each element of the list as separate elements in max_paths.
-        elif current_depth == max_depth[0]:
-            max_paths.append(current_path[:])
-
-        for neighbor in root.neighbors:
-            # In recursive call, current_depth=1 is passed
-            self.recursive_max_depth_path(neighbor, current_path, max_paths, current_depth, max_depth)
-            # When recursive call returns, we still want current_depth=1 here
-            # We don't need changes from child calls
-
-        current_path.pop()  # Backtrack to explore other paths.
-        """
-        Why do we use current_path.pop()?
-        - When we explore a path down the tree, we add nodes to current_path
-        - After exploring all children of a node, we need to remove that node from the path
-        - This ensures that when we backtrack to explore other paths, we don't include nodes from previously explored paths
-        - By popping the last node, we maintain the correct state of current_path for the next recursive calls
-        - This is crucial for correctly tracking the path as we explore different branches of the tree
-        - If we didn't pop, current_path would keep growing with nodes from all explored paths, leading to incorrect results
-        - This is a form of backtracking, where we remove the last added node to return to the previous state of the path
-        This pattern of adding a node before exploring its subtrees and removing it afterward (backtracking) is a common technique in tree traversal algorithms to maintain the correct path state during recursion.
         """
+        Each stack entry remembers the node together with its depth.
+        When we pop a node at depth d, everything in current_path past depth d - 1 belongs to a branch we already
+        finished, so truncating current_path to d - 1 entries is the backtracking step (the current_path.pop() of the
+        recursive version, done for all finished levels at once).
+        """
+        tracer = self.tracer
+        trail = []
+        base = len(current_path)
+        stack = [(root, current_depth + 1)]
+        while stack:
+            node, depth = stack.pop()
+            del current_path[base + depth - current_depth - 1:]
+            current_path.append(node.value)
+            if tracer is not None:
+                descend(tracer, trail, depth - current_depth - 1, node, len(stack))
+
+            if depth > max_depth[0]:
+                max_depth[0] = depth
+                max_paths.clear()  # clear previous max paths if found deeper path
+                max_paths.append(current_path[:])  # current_path[:] is a copy, current_path keeps changing as we backtrack
+            elif depth == max_depth[0]:
+                max_paths.append(current_path[:])
+
+            for neighbor in reversed(node.neighbors):
+                if neighbor is not None:
+                    stack.append((neighbor, depth + 1))
+
+        del current_path[base:]  # leave the caller's path as we found it
+        if tracer is not None:
+            backtrack(tracer, trail, 0)
         return max_paths
 
+    @traced
     def recursive_find_all_paths(self, root, current_path=None, paths=None):
+        if isinstance(root, CompactTree):
+            return root.find_all_paths()
         if current_path is None:
             current_path = []
         if paths is None:
@@ -125,17 +243,30 @@ class DFS:
         if root is None:
             return paths
 
-        current_path.append(root.value)
+        tracer = self.tracer
+        trail = []
+        base = len(current_path)
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            del current_path[base + depth:]  # backtrack out of finished branches
+            current_path.append(node.value)
+            if tracer is not None:
+                descend(tracer, trail, depth, node, len(stack))
 
-        if not root.neighbors:
-            paths.append(current_path[:])  # found leaf node, current path complete.
+            if not node.neighbors:
+                paths.append(current_path[:])  # found leaf node, current path complete.
 
-        for neighbor in root.neighbors:
-            self.recursive_find_all_paths(neighbor, current_path, paths)
+            for neighbor in reversed(node.neighbors):
+                if neighbor is not None:
+                    stack.append((neighbor, depth + 1))
 
-        current_path.pop()
+        del current_path[base:]
+        if tracer is not None:
+            backtrack(tracer, trail, 0)
         return paths
 
+    @traced
     def recursive_path_sum(self, root, target_sum, current_path=None, target_paths=None):
         """
         This function finds all paths in a binary tree that sum to a given target value.
@@ -144,6 +275,8 @@ class DFS:
         :param current_path: List of path values being explored
         :return: List of all paths that sum to the target value
         """
+        if isinstance(root, CompactTree):
+            return root.path_sum(target_sum)
         if current_path is None:
             current_path = []
         if target_paths is None:
@@ -152,54 +285,270 @@ class DFS:
         if root is None:
             return target_paths
 
-        current_path.append(root.value)
-        if sum(current_path) == target_sum:
-            target_paths.append(current_path[:])
-
-        for neighbor in root.neighbors:
-            self.recursive_path_sum(neighbor, target_sum, current_path, target_paths)
-
-        current_path.pop()
+        """
+        Instead of calling sum(current_path) at every node (O(depth) each), keep the running sum of every prefix:
+        running[d] is the sum of the path down to depth d, so a node's sum is its parent's plus its own value.
+        """
+        tracer = self.tracer
+        trail = []
+        base = len(current_path)
+        running = [sum(current_path)]
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            del current_path[base + depth:]
+            del running[depth + 1:]
+            current_path.append(node.value)
+            if tracer is not None:
+                descend(tracer, trail, depth, node, len(stack))
+            running.append(running[depth] + node.value)
+            if running[-1] == target_sum:
+                target_paths.append(current_path[:])
+
+            for neighbor in reversed(node.neighbors):
+                if neighbor is not None:
+                    stack.append((neighbor, depth + 1))
+
+        del current_path[base:]
+        if tracer is not None:
+            backtrack(tracer, trail, 0)
         return target_paths
 
-    def recursive_binary_search_tree(self, root):
-        if root is None:
-            return True
-
-        if root.left:
-            if root.left.value > root.value or not self.recursive_binary_search_tree(root.left):
-                return False
+    @traced
+    def iter_find_all_paths(self, root):
+        """
+        Lazy version of recursive_find_all_paths: yields each root-to-leaf path as soon as the walk reaches the leaf,
+        so only the current path is held in memory and the caller can stop early.
+        :param root:
+        :return: generator of paths (each a new list)
+        """
+        current_path = []
+        for node, depth in _pre_order_depths(root, self.tracer):
+            del current_path[depth:]
+            current_path.append(node.value)
+            if not node.neighbors:
+                yield current_path[:]
 
-        if root.right:
-            if root.right.value < root.value or not self.recursive_binary_search_tree(root.right):
-                return False
+    @traced
+    def iter_max_depth_path(self, root):
+        """
+        Lazy version of recursive_max_depth_path.
+        A first walk finds the max depth, the second yields only the paths that reach it, so no path is ever copied
+        and then thrown away when a deeper level turns up.
+        :param root:
+        :return: generator of paths (each a new list)
+        """
+        max_depth = max((depth for _, depth in _pre_order_depths(root, self.tracer)), default=-1)
+        current_path = []
+        for node, depth in _pre_order_depths(root, self.tracer):
+            del current_path[depth:]
+            current_path.append(node.value)
+            if depth == max_depth:
+                yield current_path[:]
 
-        return True
+    @traced
+    def iter_path_sum(self, root, target_sum, any_start=False):
+        """
+        Lazy version of recursive_path_sum.
+        :param root:
+        :param target_sum:
+        :param any_start: also yield downward paths that start below the root
+        :return: generator of paths that sum to target_sum
+        """
+        for _, starts, current_path in _path_sums(root, (target_sum,), any_start, self.tracer):
+            for start in starts:
+                yield current_path[start:]
 
-    def calculate_tilt(self, root):
+    @traced
+    def path_sum_count(self, root, target_sum, any_start=False):
         """
-        The tilt of a tree node is defined as the absolute difference between the sum of all left subtree node values and the sum of all right subtree node values. If a node does not have a left child, then the sum of the left subtree is treated as 0. The rule is similar if there the node does not have a right child.
-        The tilt of the whole tree is defined as the sum of all nodes' tilt.
+        Number of downward paths that sum to target_sum, without building any of them.
+        Each node adds the number of earlier prefixes on its path that sit exactly target_sum below its own prefix
+        sum, which is one dict lookup, so this is O(n) even when the number of paths is much larger.
         :param root:
+        :param target_sum:
+        :param any_start: count paths starting at any node, not only at the root
         :return:
         """
-        total_tilt = [0]
+        return sum(len(starts) for _, starts, _ in _path_sums(root, (target_sum,), any_start, self.tracer))
 
-        def _calculate_tilt(node):
-            if node is None:
-                return 0
+    @traced
+    def batch_path_sum(self, root, target_sums, any_start=False, count_only=False):
+        """
+        Answer several target sums with a single traversal.
+        :param root:
+        :param target_sums: iterable of target values
+        :param any_start: include downward paths that start below the root
+        :param count_only: return the number of paths per target instead of the paths
+        :return: dict mapping each target to its list of paths (or its count)
+        """
+        targets = set(target_sums)
+        results = {target: 0 if count_only else [] for target in targets}
+        for target, starts, current_path in _path_sums(root, targets, any_start, self.tracer):
+            if count_only:
+                results[target] += len(starts)
+            else:
+                results[target].extend(current_path[start:] for start in starts)
+        return results
+
+    @traced
+    def shared_find_all_paths(self, root):
+        """
+        Same paths as recursive_find_all_paths, returned as a PathTrie: the paths share their common prefixes and a
+        path is only built as a list when it is read.
+        :param root:
+        :return: PathTrie
+        """
+        return _collect_paths(root, lambda node, depth, path: not node.neighbors, self.tracer)
+
+    @traced
+    def shared_max_depth_path(self, root):
+        """
+        Same paths as recursive_max_depth_path, returned as a PathTrie.
+        :param root:
+        :return: PathTrie
+        """
+        max_depth = max((depth for _, depth in _pre_order_depths(root, self.tracer)), default=-1)
+        return _collect_paths(root, lambda node, depth, path: depth == max_depth, self.tracer)
+
+    @traced
+    def shared_path_sum(self, root, target_sum):
+        """
+        Same paths as recursive_path_sum, returned as a PathTrie.
+        :param root:
+        :param target_sum:
+        :return: PathTrie
+        """
+        running = []
 
-            left_sum = _calculate_tilt(node.left)
-            right_sum = _calculate_tilt(node.right)
+        def keep(node, depth, path):
+            del running[depth:]
+            running.append((running[-1] if depth else 0) + node.value)
+            return running[-1] == target_sum
 
-            node_tilt = abs(left_sum - right_sum)
-            total_tilt[0] += node_tilt
+        return _collect_paths(root, keep, self.tracer)
 
-            return left_sum + right_sum + node.value
+    @traced
+    def recursive_binary_search_tree(self, root):
+        """
+        Checking every node only against its direct children misses e.g. a 5 in the left subtree of 4 when it hangs
+        under a 2, so this checks every node against the bounds set by all its ancestors instead (see is_valid_bst).
+        Equal neighbors are accepted, as before.
+        """
+        if isinstance(root, CompactTree):
+            return root.is_binary_search_tree()
+        return self.is_valid_bst(root, strict=False)
 
-        _calculate_tilt(root)
-        return total_tilt[0]
+    @traced
+    def iter_in_order(self, root, morris=False):
+        """
+        Yield the nodes of a binary tree in order (left subtree, node, right subtree), by default with a stack of the
+        ancestors whose right subtree is still to come: O(height) extra memory, and the tree is only read.
+        morris=True uses Morris threading instead: O(1) extra memory, no stack and no recursion, however deep the tree.
+        Before going into a left subtree we point the right link of its last in-order node (the current node's
+        predecessor) back at the current node. That temporary "thread" is how the walk finds its way back up, and it
+        is removed again the second time we reach it, so the tree is unchanged when the walk ends. If the caller stops
+        early, the threads still in place are removed when the generator is closed.
+        With morris=True the tree is modified while the walk is in progress, so it must not be shared: no other walk,
+        in this thread or any other, may read it until this one is finished or closed. A FrozenNode tree cannot be
+        modified (and its subtrees are shared), so it is always walked with the stack.
+        :param root:
+        :param morris: trade the O(height) stack for temporary writes to the tree
+        :return: generator of nodes
+        """
+        tracer = self.tracer
+        if not morris or isinstance(root, FrozenNode):
+            yield from _stack_in_order(root, tracer)
+            return
+        current = root
+        try:
+            while current is not None:
+                if current.left is None:
+                    if tracer is not None:
+                        tracer.enter(current, 0)
+                    yield current
+                    current = current.right
+                    continue
+                predecessor = current.left
+                while predecessor.right is not None and predecessor.right is not current:
+                    predecessor = predecessor.right
+                if predecessor.right is None:
+                    predecessor.right = current  # thread back up, then go down the left subtree
+                    current = current.left
+                else:
+                    predecessor.right = None  # came back up through the thread: left subtree done
+                    if tracer is not None:
+                        tracer.enter(current, 0)
+                    yield current
+                    current = current.right
+        finally:
+            if current is not None:
+                _remove_threads(root, current)
+
+    @traced
+    def is_valid_bst(self, root, strict=True):
+        """
+        A binary tree is a BST when every node is greater than everything in its left subtree and smaller than
+        everything in its right subtree, i.e. each node lies between the min / max bounds set by its ancestors.
+        Each stack entry carries a node with the (low, high) bounds it must lie between: going left, the node's value
+        becomes the high bound, going right the low one. We stop at the first node outside its bounds. The nodes are
+        only read, so other walks can run on the same tree at the same time.
+        :param root:
+        :param strict: False allows equal values (non-decreasing order)
+        :return:
+        """
+        if isinstance(root, FrozenNode):
+            return subtree_metric(root, 'strict_bst' if strict else 'bst')
+        tracer = self.tracer
+        stack = [(root, None, None)] if root is not None else []
+        while stack:
+            node, low, high = stack.pop()
+            value = node.value
+            if strict:
+                outside = low is not None and value <= low or high is not None and value >= high
+            else:
+                outside = low is not None and value < low or high is not None and value > high
+            if outside:
+                if tracer is not None:
+                    tracer.prune(node)
+                return False
+            if tracer is not None:
+                tracer.enter(node, len(stack))
+            if node.right is not None:
+                stack.append((node.right, value, high))
+            if node.left is not None:
+                stack.append((node.left, low, value))
+        return True
 
+    @traced
+    def calculate_tilt(self, root):
+        """
+        The tilt of a tree node is defined as the absolute difference between the sum of all left subtree node values and the sum of all right subtree node values. If a node does not have a left child, then the sum of the left subtree is treated as 0. The rule is similar if there the node does not have a right child.
+        The tilt of the whole tree is defined as the sum of all nodes' tilt.
+        :param root:
+        :return:
+        """
+        if isinstance(root, CompactTree):
+            return root.tilt()
+        if isinstance(root, CachedBinarySearchTreeNode):
+            return root.subtree_tilt
+        if isinstance(root, FrozenNode):
+            return subtree_metric(root, 'tilt')
+        total_tilt = 0
+        subtree_sums = []
+        tracer = self.tracer
+        for node in _post_order(root, tracer):
+            if tracer is not None:
+                tracer.exit(node)
+            right_sum = subtree_sums.pop() if node.right is not None else 0
+            left_sum = subtree_sums.pop() if node.left is not None else 0
+
+            total_tilt += abs(left_sum - right_sum)
+
+            subtree_sums.append(left_sum + right_sum + node.value)
+        return total_tilt
+
+    @traced
     def max_diameter(self, root):
         """
         The diameter of a binary tree is the length of the longest path between any two nodes
@@ -207,95 +556,201 @@ class DFS:
         :param root:
         :return: the number of edges in the longest path
         """
-        max_diameter = [0]
-        def _max_diameter(node):
-            if node is None:
-                return 0
-            left_depth = _max_diameter(node.left) # left_depth to count the edges from the current node to the deepest leaf in the left subtree
-            right_depth = _max_diameter(node.right) # right_depth to count the edges from the current node to the deepest leaf in the right subtree
-            max_diameter[0] = max(max_diameter[0], left_depth + right_depth) # left_depth + right_depth to count the edges between left and right subtree across the current node
-            return 1 + max(left_depth, right_depth) # +1 to add the edge of the current node to its parent, max(left_depth, right_depth) to propagate the maximum depth of the subtree to its parent
-        _max_diameter(root)
-        return max_diameter[0]
-
+        if isinstance(root, CompactTree):
+            return root.diameter()
+        if isinstance(root, FrozenNode):
+            return subtree_metric(root, 'diameter')
+        max_diameter = 0
+        depths = []
+        tracer = self.tracer
+        for node in _post_order(root, tracer):
+            if tracer is not None:
+                tracer.exit(node)
+            right_depth = depths.pop() if node.right is not None else 0  # edges from the current node to the deepest leaf in the right subtree
+            left_depth = depths.pop() if node.left is not None else 0  # edges from the current node to the deepest leaf in the left subtree
+            if left_depth + right_depth > max_diameter:
+                max_diameter = left_depth + right_depth  # the edges between left and right subtree across the current node
+            depths.append(1 + max(left_depth, right_depth))  # +1 to add the edge of the current node to its parent
+        return max_diameter
+
+    @traced
     def max_unique_value_path(self, root):
         """
         Given a binary tree, find the length of the longest path where each node in the path has a unique value (each node has different value from the other nodes). This path may or may not pass through the root.
         :param root:
         :return: the number of nodes in the longest path
         """
-        max_length = [0]
-        def _max_unique_value_path(node, current_path):
-            if node is None:
-                return 0
-            if node.value in current_path:
-                return 0 # If the value is already in the path, we cannot include this node
-
-            current_path.add(node.value)
-            left_length = _max_unique_value_path(node.left, current_path) # left_length to count the edges from the current node to the deepest leaf in the left subtree with unique values, because the edge between current node to its left child is already counted in the left subtree recursive calls with 1+ in the return statement
-            right_length = _max_unique_value_path(node.right, current_path) # right_length to count the edges from the current node to the deepest leaf in the right subtree with unique values, because the edge between current node to its right child is already counted in the right subtree recursive calls with 1+ in the return statement
-            max_length[0] = max(max_length[0], left_length + right_length)
-            current_path.remove(node.value) # Backtrack: remove current node value from the path
-            return 1 + max(left_length, right_length) # +1 to count the edge between current node to its parent node, max(left_length, right_length) to propagate the maximum length of the subtree to its parent
-        _max_unique_value_path(root, set())
-        return max_length[0]
-
+        """
+        The set of values on the current root-to-node path is built on the way down and the child lengths are combined
+        on the way up, so a plain pre-order list is not enough. Each node is pushed twice: once to enter it (check and
+        add its value, then push its children) and once to leave it (combine the children and remove its value).
+        Child results are kept on a second stack, left below right, exactly in the order the recursive calls returned.
+        """
+        tracer = self.tracer
+        max_length = 0
+        current_path = set()
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, leaving = stack.pop()
+            if not leaving:
+                if node is None or node.value in current_path:
+                    if node is not None and tracer is not None:
+                        tracer.prune(node)
+                    results.append(0)  # If the value is already in the path, we cannot include this node
+                    continue
+                if tracer is not None:
+                    tracer.enter(node, len(stack))
+                current_path.add(node.value)
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+                continue
+
+            right_length = results.pop()
+            left_length = results.pop()
+            if left_length + right_length > max_length:
+                max_length = left_length + right_length
+            current_path.remove(node.value)  # Backtrack: remove current node value from the path
+            if tracer is not None:
+                tracer.exit(node)
+            results.append(1 + max(left_length, right_length))  # +1 to count the edge between current node to its parent node
+        return max_length
+
+    @traced
     def max_unique_value_path_another_way(self, root):
         """
         Given a binary tree, find the length of the longest path where each node in the path has a unique value (each node has different value from the other nodes). This path may or may not pass through the root.
         :param root:
         :return: the number of nodes in the longest path
         """
-        max_length = [0]
-        def _max_unique_value_path(node, current_path):
-            if node is None:
-                return 0
-            if node.value in current_path:
-                return 0 # If the value is already in the path, we cannot include this node
-
-            current_path.append(node.value)
-            left_length = right_length = 0
-            if node.left:
-                left_length = 1 + _max_unique_value_path(node.left, current_path)
-            if node.right:
-                right_length = 1+ _max_unique_value_path(node.right, current_path)
-            max_length[0] = max(max_length[0], left_length + right_length)
-
-            print(f"current_path {current_path}")
-            print(f"current node {node.value}")
-            print(f"left_length + right_length {left_length} + {right_length}")
-            print(f"max_length {max_length[0]}")
-
-            current_path.remove(node.value) # Backtrack: remove current node value from the path
-            return max(left_length, right_length)
-        _max_unique_value_path(root, [])
-        return max_length[0]
-
+        tracer = self.tracer
+        max_length = 0
+        current_path = set()  # values on the current root-to-node path, a set so the membership test is O(1)
+        results = []
+        stack = [(root, False)]
+        while stack:
+            node, leaving = stack.pop()
+            if not leaving:
+                if node is None or node.value in current_path:
+                    if node is not None and tracer is not None:
+                        tracer.prune(node)
+                    results.append(0)  # If the value is already in the path, we cannot include this node
+                    continue
+                if tracer is not None:
+                    tracer.enter(node, len(stack))
+                current_path.add(node.value)
+                stack.append((node, True))
+                if node.right:
+                    stack.append((node.right, False))
+                if node.left:
+                    stack.append((node.left, False))
+                continue
+
+            right_length = 1 + results.pop() if node.right else 0
+            left_length = 1 + results.pop() if node.left else 0
+            max_length = max(max_length, left_length + right_length)
+            current_path.remove(node.value)  # Backtrack: remove current node value from the path
+            if tracer is not None:
+                tracer.exit(node)
+            results.append(max(left_length, right_length))
+        return max_length
+
+    @traced
     def max_universal_value_path(self, root):
         """
         Given a binary tree, find the length of the longest path where each node in the path has the same value. This path may or may not pass through the root.
         :param root:
         :return: the number of nodes in the longest path
         """
-        max_length = [0]
-        def _max_universal_value_path(node):
-            if node is None:
-                return 0
-
-            # Initialize current paths
-            left_depth = right_depth = 0
-            # Extend paths if child values match current node value
-            if node.left and node.left.value == node.value:
-                left_depth = 1 + _max_universal_value_path(node.left) # 1 + to count the edge between current node to its left child
-            if node.right and node.right.value == node.value:
-                right_depth = 1 +  _max_universal_value_path(node.right) # 1 + to count the edge between current node to its right child
-            # Update global max and return current max path
-            max_length[0] = max(max_length[0], left_depth + right_depth)
-            return max(left_depth, right_depth) # return the max path length extending from the current node to its farthest child with the same value
-
-        _max_universal_value_path(root)
-        return max_length[0]
+        if isinstance(root, CompactTree):
+            return root.universal_value_path()
+        if isinstance(root, FrozenNode):
+            return subtree_metric(root, 'universal_path')
+        max_length = 0
+        # depths holds the longest same-value path going down from each finished child, right child on top
+        depths = []
+        tracer = self.tracer
+        for node in _post_order(root, tracer):
+            if tracer is not None:
+                tracer.exit(node)
+            right_depth = depths.pop() if node.right is not None else 0
+            left_depth = depths.pop() if node.left is not None else 0
+            # Extend paths only if child values match current node value
+            left_depth = 1 + left_depth if node.left and node.left.value == node.value else 0  # 1 + to count the edge between current node to its left child
+            right_depth = 1 + right_depth if node.right and node.right.value == node.value else 0  # 1 + to count the edge between current node to its right child
+            # Update global max and store current max path
+            if left_depth + right_depth > max_length:
+                max_length = left_depth + right_depth
+            depths.append(max(left_depth, right_depth))
+        return max_length
+
+    @traced
+    def analyze(self, root, metrics=METRICS):
+        """
+        Compute the metrics of a binary tree in one post-order pass instead of one walk per method.
+        Each metric gives the same answer as its method: sum (recursive_sum_of_nodes), max (recursive_max_node),
+        depth (recursive_max_depth_of_tree), tilt (calculate_tilt), diameter (max_diameter) and universal_path
+        (max_universal_value_path). Children are read from left / right, so sum, max and depth agree with the
+        neighbor-based methods for trees built with add_left / add_right / add_child.
+        :param root:
+        :param metrics: any subset of METRICS
+        :return: TreeAnalysis with the requested fields filled in
+        """
+        wanted = set(metrics)
+        if not wanted <= set(METRICS):
+            raise ValueError(f"unknown metrics {sorted(wanted - set(METRICS))}, expected a subset of {METRICS}")
+        if isinstance(root, CompactTree):
+            # without a left/right layout only sum, max and depth exist, the other metrics stay None
+            results = root.summary_metrics(root.summarize())
+            return TreeAnalysis(**{metric: results[metric] for metric in wanted if metric in results})
+        if isinstance(root, FrozenNode):
+            return TreeAnalysis(**{metric: subtree_metric(root, metric) for metric in wanted})
 
+        """
+        Every finished subtree leaves one (sum, depth, universal depth) tuple on the results stack, right child on top,
+        same scheme as calculate_tilt / max_diameter / max_universal_value_path use with one value per stack.
+        The six metrics share the walk and the child lookups, so computing all of them costs little more than one,
+        and the metrics that were not asked for are simply left out of the result.
+        """
+        results = []
+        total_tilt = max_diameter = max_universal = 0
+        max_value = float('-inf')
+        tracer = self.tracer
+        for node in _post_order(root, tracer):
+            if tracer is not None:
+                tracer.exit(node)
+            left, right, value = node.left, node.right, node.value
+            right_sum, right_depth, right_universal = results.pop() if right is not None else (0, 0, 0)
+            left_sum, left_depth, left_universal = results.pop() if left is not None else (0, 0, 0)
+
+            total_tilt += abs(left_sum - right_sum)
+            if left_depth + right_depth > max_diameter:
+                max_diameter = left_depth + right_depth
+            left_universal = 1 + left_universal if left is not None and left.value == value else 0
+            right_universal = 1 + right_universal if right is not None and right.value == value else 0
+            if left_universal + right_universal > max_universal:
+                max_universal = left_universal + right_universal
+            if value > max_value:
+                max_value = value
+
+            results.append((left_sum + right_sum + value, 1 + max(left_depth, right_depth),
+                            max(left_universal, right_universal)))
+
+        # The root's depth counts the nodes on the longest root-to-leaf path. That is also what
+        # recursive_max_depth_of_tree returns for a BinarySearchTreeNode, whose empty neighbor slots count as a level.
+        total, depth, _ = results[-1] if results else (0, 0, 0)
+        results = {
+            'sum': total,
+            'max': max_value,
+            'depth': depth,
+            'tilt': total_tilt,
+            'diameter': max_diameter,
+            'universal_path': max_universal,
+        }
+        return TreeAnalysis(**{metric: results[metric] for metric in wanted})
+
+    @traced
     def valid_tree(self, n, edges):
         """
          given an integer n and a list of undirected edges where each entry in the list is a pair of integers representing an edge between nodes 1 and n. You have to write a function to check whether these edges make up a valid tree.
@@ -311,34 +766,148 @@ class DFS:
         if n == 0:
             return True
 
-        from collections import defaultdict
-
-        graph = defaultdict(list)
         """
-        A defaultdict(list) creates a dictionary that automatically initializes a new empty list [] when accessing a non-existent key, instead of raising a KeyError.
-        This is particularly useful for building adjacency lists in graph representations, where each key (node) maps to a list of its neighbors.
+        Instead of building an adjacency list and walking it, feed the edges to a union-find: an edge whose endpoints
+        are already connected closes a cycle, so we can stop right there, and after the last edge the graph is a tree
+        exactly when one component is left. Edges can come from any iterator and are read only once.
         """
-        for u, v in edges:
-            graph[u].append(v)
-            graph[v].append(u)
-
-        visited = set()
-
-        def dfs(node, parent):
-            visited.add(node)
-            for neighbor in graph[node]:
-                if neighbor not in visited:
-                    if not dfs(neighbor, node):
-                        return False
-                elif neighbor != parent:
-                    return False
-            return True
-
-        if not dfs(0, -1):
-            return False
+        uf = UnionFind(n)
+        try:
+            if not uf.add_edges(edges):
+                return False
+        except ValueError:
+            return False  # an edge names a vertex outside 0..n-1
+        return uf.components == 1
 
-        return len(visited) == n
 
+def _remove_threads(root, current):
+    """
+    Undo the Morris threads left behind when iter_in_order stops at current.
+    A thread exists for exactly the ancestors whose left subtree holds current, so walking down from the root we go
+    left where a node's predecessor points back at it (removing that thread) and right otherwise, until we reach current.
+    """
+    node = root
+    while node is not current:
+        predecessor = node.left
+        while predecessor is not None and predecessor.right is not None and predecessor.right is not node:
+            predecessor = predecessor.right
+        if predecessor is not None and predecessor.right is node:
+            predecessor.right = None
+            node = node.left
+        else:
+            node = node.right
+
+
+def _stack_in_order(root, tracer=None):
+    """In-order walk of a binary tree with an explicit stack of ancestors, leaving the nodes untouched."""
+    ancestors = []
+    current = root
+    while current is not None or ancestors:
+        while current is not None:
+            ancestors.append(current)
+            current = current.left
+        current = ancestors.pop()
+        if tracer is not None:
+            tracer.enter(current, len(ancestors))
+        yield current
+        current = current.right
+
+
+def _pre_order_depths(root, tracer=None):
+    """Yield (node, depth) for the non-None nodes under root in the same pre-order as the DFS methods, root at depth 0."""
+    trail = []
+    stack = [(root, 0)] if root is not None else []
+    while stack:
+        node, depth = stack.pop()
+        if tracer is not None:
+            descend(tracer, trail, depth, node, len(stack))
+        yield node, depth
+        for neighbor in reversed(node.neighbors):
+            if neighbor is not None:
+                stack.append((neighbor, depth + 1))
+    if tracer is not None:
+        backtrack(tracer, trail, 0)
+
+
+def _path_sums(root, targets, any_start, tracer=None):
+    """
+    One pre-order walk that reports, for every node and every target, which downward paths ending at that node sum to
+    the target. Yields (target, starts, current_path): each path is current_path[start:] for start in starts.
+    current_path and starts are live and only valid until the next item, so callers copy what they keep.
+
+    prefix[d] is the sum of the first d values of the current path (prefix[0] = 0), and depths_by_prefix maps a
+    prefix sum to the depths where it occurs on the current path. The path current_path[d:] ends at the node with
+    prefix P and sums to P - prefix[d], so the starts for target t are simply depths_by_prefix[P - t].
+    Backtracking removes the prefixes of the abandoned levels, which are always the last entries of their lists.
+    """
+    current_path = []
+    prefix = [0]
+    depths_by_prefix = {0: [0]}
+    for node, depth in _pre_order_depths(root, tracer):
+        while len(prefix) > depth + 1:
+            abandoned = prefix.pop()
+            starts = depths_by_prefix[abandoned]
+            starts.pop()
+            if not starts:
+                del depths_by_prefix[abandoned]
+        del current_path[depth:]
+        current_path.append(node.value)
+        running = prefix[depth] + node.value
+        if any_start:
+            for target in targets:
+                starts = depths_by_prefix.get(running - target)
+                if starts:
+                    yield target, starts, current_path
+        elif running in targets:
+            yield running, _ROOT_START, current_path
+        prefix.append(running)
+        depths_by_prefix.setdefault(running, []).append(depth + 1)
+
+
+def _collect_paths(root, keep, tracer=None):
+    """
+    Walk the tree once and store in a PathTrie every root-to-node path for which keep(node, depth, path) is true.
+    Trie entries are only created for nodes that lie on a kept path: entries[d] is the trie entry of the node at depth d
+    of the current path, or NO_PARENT while nobody has needed it yet.
+    """
+    trie = PathTrie()
+    current_path = []
+    entries = []
+    for node, depth in _pre_order_depths(root, tracer):
+        del current_path[depth:]
+        del entries[depth:]
+        current_path.append(node.value)
+        entries.append(NO_PARENT)
+        if not keep(node, depth, current_path):
+            continue
+        first_missing = depth
+        while first_missing > 0 and entries[first_missing - 1] == NO_PARENT:
+            first_missing -= 1
+        for d in range(first_missing, depth + 1):
+            entries[d] = trie.add(current_path[d], entries[d - 1] if d else NO_PARENT)
+        trie.mark(entries[depth])
+    return trie
+
+
+def _post_order(root, tracer=None):
+    """
+    Return the non-None nodes of a binary tree in post-order (left subtree, right subtree, node).
+    Walking node -> right -> left with a stack and reversing the result gives exactly that order, so a caller can keep
+    child results on a plain list: when a node comes up, its right child's result is on top and its left child's below.
+    """
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            continue
+        if tracer is not None:
+            tracer.enter(node, len(stack))
+        order.append(node)
+        stack.append(node.left)
+        stack.append(node.right)
+    order.reverse()
+    return order
 
 
 if __name__ == "__main__":
@@ -359,6 +928,24 @@ if __name__ == "__main__":
     result = dfs.recursive_dfs(a)
     assert result == "A->B->E->D->C", f"Expected \"A->B->E->D->C\", but got {result}"
 
+    # Traversal state lives in each call, so a cycle is walked once and several threads can share the graph
+    e.add_neighbor(a)
+    assert dfs.recursive_dfs(a) == "A->B->E->D->C"
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        orders = list(pool.map(lambda _: [node.value for node in dfs.iter_dfs(a)], range(8)))
+    assert all(order == ["A", "B", "E", "D", "C"] for order in orders), f"Expected the same order in every thread, but got {orders}"
+    e.neighbors.remove(a)
+
+    # Bulk loading from an edge list builds the same graph and drops duplicate edges
+    nodes = Node.from_edges([("A", "B"), ("A", "C"), ("B", "E"), ("B", "D"), ("A", "B")])
+    assert dfs.recursive_dfs(nodes["A"]) == "A->B->E->D->C"
+    assert [n.value for n in nodes["A"].neighbors] == ["B", "C"]
+    nodes = Node.from_edges([(1, 2), (2, 1), (2, 3)], directed=False)
+    assert [n.value for n in nodes[2].neighbors] == [1, 3]
+    nodes[1].add_neighbors([nodes[3], nodes[2], nodes[3]])
+    assert [n.value for n in nodes[1].neighbors] == [2, 3]
+
     # Test the recursive sum of nodes implementation
     a.value = 1
     b.value = 2
@@ -398,6 +985,28 @@ if __name__ == "__main__":
     target_paths = dfs.recursive_path_sum(a, 8)
     assert target_paths == [[1, 2, 5]], f"Expected [1, 2, 5] but got {target_paths}"
 
+    # Lazy and shared-prefix variants give the same paths
+    assert list(dfs.iter_find_all_paths(a)) == all_paths
+    assert list(dfs.iter_max_depth_path(a)) == max_depth_path
+    assert list(dfs.iter_path_sum(a, 8)) == [[1, 2, 5]]
+    shared_paths = dfs.shared_find_all_paths(a)
+    assert list(shared_paths) == all_paths and len(shared_paths.values) == 5, f"Expected 3 paths over 5 entries, but got {shared_paths}"
+    assert list(dfs.shared_max_depth_path(a)) == max_depth_path
+    assert list(dfs.shared_path_sum(a, 7)) == [[1, 2, 4]]
+
+    # Paths may also start below the root: with any_start, [2, 5] also sums to 7
+    assert list(dfs.iter_path_sum(a, 7, any_start=True)) == [[2, 5], [1, 2, 4]]
+    assert dfs.path_sum_count(a, 7, any_start=True) == 2
+    assert dfs.path_sum_count(a, 7) == 1
+    assert dfs.batch_path_sum(a, [4, 7, 13]) == {4: [[1, 3]], 7: [[1, 2, 4]], 13: []}
+    assert dfs.batch_path_sum(a, [3, 5], any_start=True, count_only=True) == {3: 2, 5: 1}
+
+    # The same questions answered directly on the array-backed store
+    compact = CompactTree.from_node(a)
+    assert dfs.recursive_sum_of_nodes(compact) == 15
+    assert dfs.recursive_max_depth_path(compact) == [[1, 2, 5], [1, 2, 4]]
+    assert dfs.recursive_path_sum(compact, 7) == [[1, 2, 4]]
+
     # Create a binary search tree for testing
     from BinarySearchTreeNode import BinarySearchTreeNode
 
@@ -421,6 +1030,24 @@ if __name__ == "__main__":
     is_bst = dfs.recursive_binary_search_tree(a)
     assert is_bst == True, f"Expected a binary search tree but got {is_bst}"
 
+    # In-order walks and the bound-checking validator
+    assert [node.value for node in dfs.iter_in_order(a)] == [1, 2, 3, 4, 6]
+    assert [node.value for node in dfs.iter_in_order(a, morris=True)] == [1, 2, 3, 4, 6]
+    assert dfs.is_valid_bst(a)
+    e.value = 5  # still larger than its parent 2, but it sits in the left subtree of 4
+    assert not dfs.is_valid_bst(a) and not dfs.recursive_binary_search_tree(a)
+    assert dfs.is_valid_bst(a, strict=False) is False
+    e.value = 3
+    walk = dfs.iter_in_order(a, morris=True)
+    next(walk)
+    walk.close()
+    assert b.right is e and e.right is None and d.right is None, "Expected the Morris threads to be removed"
+    # The default walk only reads the tree, so other methods can run on it while the walk is paused
+    walk = dfs.iter_in_order(a)
+    assert next(walk).value == 1 and next(walk).value == 2
+    assert dfs.max_diameter(a) == 3 and dfs.recursive_binary_search_tree(a) and CompactTree.from_node(a).is_binary_search_tree()
+    assert [node.value for node in walk] == [3, 4, 6]
+
     # Test the calculate tile
     """
         4
@@ -438,10 +1065,31 @@ if __name__ == "__main__":
     total_tilt = dfs.calculate_tilt(a)
     assert total_tilt == 2, f"Expected 2 but got {total_tilt}"
 
+    # Cached aggregates answer the same questions without walking the tree
+    cached = CachedBinarySearchTreeNode.from_node(a)
+    assert dfs.calculate_tilt(cached) == 2
+    assert dfs.recursive_sum_of_nodes(cached) == 16
+    assert dfs.recursive_max_node(cached) == 6
+    assert dfs.recursive_max_depth_of_tree(cached) == 3
+
     # Test the max diameter
     max_diameter = dfs.max_diameter(a)
     assert max_diameter == 3, f"Expected 3, but got {max_diameter}"
 
+    compact = CompactTree.from_node(a)
+    assert dfs.calculate_tilt(compact) == 2
+    assert dfs.max_diameter(compact) == 3
+    assert dfs.recursive_binary_search_tree(compact) == True
+
+    # All metrics from a single pass
+    analysis = dfs.analyze(a)
+    assert analysis == (16, 6, 3, 2, 3, 0), f"Expected (16, 6, 3, 2, 3, 0), but got {analysis}"
+    assert dfs.analyze(a, metrics=('tilt',)) == TreeAnalysis(tilt=2)
+    assert dfs.analyze(CompactTree.from_node(a)) == analysis
+    nodes = Node.from_edges([(1, 2), (1, 3)])
+    analysis = dfs.analyze(CompactTree.from_node(nodes[1]))
+    assert analysis == TreeAnalysis(sum=6, max=3, depth=1), f"Expected sum 6, max 3, depth 1, but got {analysis}"
+
     # Test the max unique value path
     """
         4
@@ -482,4 +1130,33 @@ if __name__ == "__main__":
     c.right = g
     max_universal_value_path = dfs.max_universal_value_path(a)
     assert max_universal_value_path == 4, f"Expected 4, but got {max_universal_value_path}"
-
+    assert dfs.analyze(a, metrics=['universal_path']).universal_path == 4
+
+    # Test valid tree
+    assert dfs.valid_tree(4, [[0, 1], [2, 3]]) == False
+    assert dfs.valid_tree(5, [[0, 1], [0, 2], [0, 3], [1, 4]]) == True
+    assert dfs.valid_tree(3, [[0, 1], [1, 2], [2, 0]]) == False
+    assert dfs.valid_tree(5, ((i, i + 1) for i in range(4))) == True
+
+    # A tracer sees every node a call enters, backtracks out of or prunes, without changing the answer
+    from tracing import TraversalStats
+    stats = TraversalStats()
+    traced_dfs = DFS(tracer=stats)
+    root = BinarySearchTreeNode(4)
+    two = BinarySearchTreeNode(2)
+    root.add_child(two)
+    root.add_child(BinarySearchTreeNode(6))
+    two.add_child(BinarySearchTreeNode(1))
+    two.add_child(BinarySearchTreeNode(3))
+    graph = Node.from_edges([(4, 2), (4, 6), (2, 1), (2, 3)])
+    assert traced_dfs.recursive_find_all_paths(graph[4]) == [[4, 2, 1], [4, 2, 3], [4, 6]]
+    assert (stats.calls, stats.nodes_visited, stats.backtracks, stats.max_stack_depth) == (1, 5, 5, 2), f"Got {stats}"
+    assert traced_dfs.max_unique_value_path_another_way(root) == 3
+    assert (stats.calls, stats.nodes_visited, stats.backtracks, stats.prunes) == (2, 10, 10, 0), f"Got {stats}"
+
+    stats.reset()
+    assert traced_dfs.max_unique_value_path(a) == 0  # the 4-only tree: both children repeat the root's value
+    assert (stats.nodes_visited, stats.prunes) == (1, 2), f"Got {stats}"
+    stats.reset()
+    assert [node.value for node in traced_dfs.iter_dfs(graph[4])] == [4, 2, 1, 3, 6]
+    assert stats.calls == 1 and stats.nodes_visited == 5 and stats.wall_time > 0
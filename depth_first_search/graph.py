@@ -0,0 +1,320 @@
+"""
+DFS on general directed Node graphs, where the DFS tree methods would loop forever on a cycle or walk a shared node
+once per path that reaches it.
+Every function first numbers the nodes reachable from the root(s) 0..n-1 and copies the edges into CSR arrays (see
+_Graph), then runs on plain ints with explicit stacks, so everything here is O(V + E) and never recurses.
+A root argument is a Node or a list of Nodes; None neighbors (empty BinarySearchTreeNode slots) are skipped.
+"""
+
+from array import array
+
+from Node import Node
+
+_UNSEEN, _ACTIVE, _DONE = 0, 1, 2  # DFS colors: not reached yet, on the current path, finished
+
+
+class _Graph:
+    """
+    The nodes reachable from roots, numbered in the order they are discovered (the roots first), and their edges:
+    the neighbors of node i are targets[offsets[i]:offsets[i + 1]], in neighbor order, duplicates kept.
+    """
+
+    __slots__ = ('nodes', 'index', 'offsets', 'targets')
+
+    def __init__(self, roots):
+        roots = [roots] if isinstance(roots, Node) else list(roots)
+        index = {}
+        nodes = []
+        for root in roots:
+            if id(root) not in index:
+                index[id(root)] = len(nodes)
+                nodes.append(root)
+        offsets = array('q', [0])
+        targets = array('q')
+        i = 0
+        while i < len(nodes):  # nodes grows while we scan it, so every reachable node gets its turn
+            for neighbor in nodes[i].neighbors:
+                if neighbor is None:
+                    continue
+                j = index.get(id(neighbor))
+                if j is None:
+                    j = index[id(neighbor)] = len(nodes)
+                    nodes.append(neighbor)
+                targets.append(j)
+            offsets.append(len(targets))
+            i += 1
+        self.nodes = nodes
+        self.index = index  # id(node) -> its number
+        self.offsets = offsets
+        self.targets = targets
+
+
+def _depth_first(graph, starts):
+    """
+    Iterative DFS from each start that is still unseen, following edges in neighbor order.
+    :return: (post-order list of node numbers, cycle) where cycle is the list of node numbers of the first cycle
+    found (following edges from cycle[0] back to cycle[0]), or None if the reachable graph is acyclic
+    """
+    offsets, targets = graph.offsets, graph.targets
+    color = bytearray(len(graph.nodes))
+    position = array('q', offsets[:-1])  # next edge to follow from each node
+    post_order = []
+    for start in starts:
+        if color[start] != _UNSEEN:
+            continue
+        color[start] = _ACTIVE
+        path = [start]
+        while path:
+            v = path[-1]
+            if position[v] < offsets[v + 1]:
+                w = targets[position[v]]
+                position[v] += 1
+                if color[w] == _UNSEEN:
+                    color[w] = _ACTIVE
+                    path.append(w)
+                elif color[w] == _ACTIVE:  # an edge back into the current path closes a cycle
+                    return post_order, path[path.index(w):]
+            else:
+                color[v] = _DONE
+                post_order.append(v)
+                path.pop()
+    return post_order, None
+
+
+def find_cycle(roots):
+    """
+    :return: the nodes of a directed cycle reachable from roots, in edge order (the last one links back to the first),
+    or None if there is none
+    """
+    graph = _Graph(roots)
+    _, cycle = _depth_first(graph, range(len(graph.nodes)))
+    return None if cycle is None else [graph.nodes[v] for v in cycle]
+
+
+def has_cycle(roots):
+    return find_cycle(roots) is not None
+
+
+def topological_sort(roots):
+    """
+    Order the nodes reachable from roots so that every edge goes from an earlier node to a later one (reverse DFS
+    post-order). Raises ValueError naming a cycle if there is one, since then no such order exists.
+    :return: list of nodes
+    """
+    graph = _Graph(roots)
+    post_order, cycle = _depth_first(graph, range(len(graph.nodes)))
+    if cycle is not None:
+        raise ValueError(f"not a DAG, cycle {[graph.nodes[v] for v in cycle]}")
+    return [graph.nodes[v] for v in reversed(post_order)]
+
+
+def _tarjan(graph):
+    """
+    Tarjan's strongly connected components, iterative: one DFS in which low[v] is the smallest DFS index reachable
+    from v's subtree through at most one edge back into the stack of open components. When v finishes with
+    low[v] == index[v], v is the first node of its component and everything above it on that stack belongs to it.
+    :return: (components, component_of): lists of node numbers, sinks first (every edge between two components goes
+    from a later one to an earlier one), and the component number of every node
+    """
+    offsets, targets = graph.offsets, graph.targets
+    n = len(graph.nodes)
+    index = array('q', [-1]) * n
+    low = array('q', [0]) * n
+    on_stack = bytearray(n)
+    position = array('q', offsets[:-1])
+    component_of = array('q', [-1]) * n
+    components = []
+    open_nodes = []
+    counter = 0
+    for start in range(n):
+        if index[start] != -1:
+            continue
+        index[start] = low[start] = counter
+        counter += 1
+        open_nodes.append(start)
+        on_stack[start] = 1
+        path = [start]
+        while path:
+            v = path[-1]
+            if position[v] < offsets[v + 1]:
+                w = targets[position[v]]
+                position[v] += 1
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    open_nodes.append(w)
+                    on_stack[w] = 1
+                    path.append(w)
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+            path.pop()
+            if path and low[v] < low[path[-1]]:
+                low[path[-1]] = low[v]
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = open_nodes.pop()
+                    on_stack[w] = 0
+                    component_of[w] = len(components)
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components, component_of
+
+
+def strongly_connected_components(roots):
+    """
+    Split the graph reachable from roots into strongly connected components: maximal sets of nodes that can all
+    reach each other. A node on no cycle is a component of its own.
+    :return: list of components (lists of nodes), sinks first, i.e. in reverse topological order of the condensation
+    """
+    graph = _Graph(roots)
+    components, _ = _tarjan(graph)
+    return [[graph.nodes[v] for v in component] for component in components]
+
+
+def condensation(roots, merge=tuple):
+    """
+    Collapse every strongly connected component into one Node, which always leaves a DAG, so every DFS method and
+    the dag_ functions below can run on it.
+    :param roots:
+    :param merge: merge(list of member values) -> value of the component node, e.g. sum or max
+    :return: the component node of each root, in the order given, repeats included (a single node if roots is a
+    single node)
+    """
+    single = isinstance(roots, Node)
+    roots = [roots] if single else list(roots)  # a generator can only be read once
+    graph = _Graph(roots)
+    components, component_of = _tarjan(graph)
+    nodes = graph.nodes
+    component_nodes = [Node(merge([nodes[v].value for v in component])) for component in components]
+    offsets, targets = graph.offsets, graph.targets
+    seen = set()
+    for v in range(len(nodes)):
+        a = component_of[v]
+        for j in range(offsets[v], offsets[v + 1]):
+            b = component_of[targets[j]]
+            if a != b and (a, b) not in seen:
+                seen.add((a, b))
+                component_nodes[a].neighbors.append(component_nodes[b])
+    result = [component_nodes[component_of[graph.index[id(root)]]] for root in roots]
+    return result[0] if single else result
+
+
+def _dag_order(root):
+    """:return: (graph, post-order) of the DAG under root; raises ValueError if there is a cycle"""
+    graph = _Graph(root)
+    post_order, cycle = _depth_first(graph, range(len(graph.nodes)))
+    if cycle is not None:
+        raise ValueError(f"not a DAG, cycle {[graph.nodes[v] for v in cycle]}; run it on condensation(root)")
+    return graph, post_order
+
+
+"""
+The dag_ functions give the same answer the DFS method would, which walks a DAG as the tree of all its paths and so
+visits a shared node once per path to it (exponentially often in the worst case). Here each node is computed once,
+from its neighbors' memoized results, in post-order: O(V + E).
+"""
+
+
+def dag_sum_of_nodes(root):
+    """Same as DFS.recursive_sum_of_nodes on a DAG: a node reached by k paths counts k times."""
+    graph, post_order = _dag_order(root)
+    nodes, offsets, targets = graph.nodes, graph.offsets, graph.targets
+    totals = [0] * len(nodes)
+    for v in post_order:
+        totals[v] = nodes[v].value + sum(totals[targets[j]] for j in range(offsets[v], offsets[v + 1]))
+    return totals[0] if nodes else 0
+
+
+def dag_max_node(root):
+    """Same as DFS.recursive_max_node on a DAG."""
+    graph, _ = _dag_order(root)
+    return max((node.value for node in graph.nodes), default=float('-inf'))
+
+
+def dag_max_depth(root):
+    """Edges on the longest path from root, same as DFS.recursive_max_depth_of_tree for Node DAGs."""
+    graph, post_order = _dag_order(root)
+    offsets, targets = graph.offsets, graph.targets
+    depths = [0] * len(graph.nodes)
+    for v in post_order:
+        depths[v] = max((1 + depths[targets[j]] for j in range(offsets[v], offsets[v + 1])), default=0)
+    return depths[0] if graph.nodes else 0
+
+
+def dag_count_paths(root):
+    """Number of root-to-leaf paths, i.e. len(DFS.recursive_find_all_paths(root)) without listing them."""
+    graph, post_order = _dag_order(root)
+    nodes, offsets, targets = graph.nodes, graph.offsets, graph.targets
+    counts = [0] * len(nodes)
+    for v in post_order:
+        if not nodes[v].neighbors:
+            counts[v] = 1
+        else:
+            counts[v] = sum(counts[targets[j]] for j in range(offsets[v], offsets[v + 1]))
+    return counts[0] if nodes else 0
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from dfs import DFS
+
+    dfs = DFS()
+    # 1 -> 2 -> 3 -> 1 is a cycle, 3 -> 4 -> 5 -> 4 another, 6 hangs off 2
+    nodes = Node.from_edges([(1, 2), (2, 3), (3, 1), (3, 4), (4, 5), (5, 4), (2, 6)])
+    cycle = find_cycle(nodes[1])
+    assert [node.value for node in cycle] == [1, 2, 3], f"Expected the cycle 1 -> 2 -> 3, but got {cycle}"
+    components = strongly_connected_components(nodes[1])
+    assert sorted(sorted(node.value for node in c) for c in components) == [[1, 2, 3], [4, 5], [6]]
+    dag = condensation(nodes[1], merge=sum)
+    assert dag.value == 6 and sorted(node.value for node in dag.neighbors) == [6, 9]
+    assert not has_cycle(dag) and dfs.recursive_sum_of_nodes(dag) == dag_sum_of_nodes(dag) == 21
+    # Roots map back to their own components, repeated or given as a generator
+    dags = condensation((nodes[value] for value in (1, 1, 4, 6, 5)), merge=sorted)
+    assert [dag.value for dag in dags] == [[1, 2, 3], [1, 2, 3], [4, 5], [6], [4, 5]], f"Got {dags}"
+    assert dags[0] is dags[1] and dags[2] is dags[4]
+    try:
+        topological_sort(nodes[1])
+        assert False, "Expected ValueError for a graph with a cycle"
+    except ValueError:
+        pass
+
+    # A diamond chain: 2^k paths through k diamonds, but only 3k + 1 nodes
+    edges = []
+    for i in range(0, 60, 3):
+        edges += [(i, i + 1), (i, i + 2), (i + 1, i + 3), (i + 2, i + 3)]
+    nodes = Node.from_edges(edges)
+    order = topological_sort(nodes[0])
+    position = {id(node): i for i, node in enumerate(order)}
+    assert all(position[id(u)] < position[id(v)] for u in order for v in u.neighbors)
+    assert dag_count_paths(nodes[0]) == 2 ** 20 and dag_max_depth(nodes[0]) == 40
+    assert dag_sum_of_nodes(nodes[54]) == dfs.recursive_sum_of_nodes(nodes[54])
+    assert dag_count_paths(nodes[54]) == len(dfs.recursive_find_all_paths(nodes[54])) == 4
+    assert dag_max_node(nodes[0]) == 60 and dag_max_depth(nodes[54]) == dfs.recursive_max_depth_of_tree(nodes[54])
+
+    # Random graphs: Tarjan's components agree with mutual reachability, condensation is acyclic
+    rng = random.Random(3)
+    for _ in range(20):
+        n = rng.randint(1, 30)
+        nodes = Node.from_edges([(0, 0)] + [(rng.randrange(n), rng.randrange(n)) for _ in range(rng.randint(0, 60))])
+        everything = list(nodes.values())
+        reach = {id(node): {id(m) for m in dfs.iter_dfs(node)} for node in everything}
+        component_of = {id(node): i for i, c in enumerate(strongly_connected_components(everything)) for node in c}
+        for u in everything:
+            for v in everything:
+                mutual = id(v) in reach[id(u)] and id(u) in reach[id(v)]
+                assert mutual == (component_of[id(u)] == component_of[id(v)])
+        assert not any(has_cycle(node) for node in condensation(everything, merge=len))
+
+    # A long chain with a back edge: nothing recurses
+    n = 200000
+    nodes = Node.from_edges([(i, i + 1) for i in range(n)] + [(n, 0)])
+    start = time.perf_counter()
+    assert len(strongly_connected_components(nodes[0])) == 1
+    assert len(find_cycle(nodes[0])) == n + 1
+    assert time.perf_counter() - start < 10
@@ -0,0 +1,371 @@
+"""
+DFS over graphs that live in a key-value store instead of in Node objects.
+A node is just a key: a NodeLoader turns a batch of keys into (value, neighbor keys) records, and AsyncDFS walks the
+keys with the same explicit-stack loops as DFS, awaiting the loader whenever a record is not in its cache.
+Two things keep the store round trips down:
+- batching: when a record is missing, the walk also asks for the other missing keys near the top of the stack, which
+  are the nodes it will visit next, so one query serves many nodes;
+- prefetching: the next batch is requested in a background task before it is needed, so loading overlaps with the
+  work on the nodes that are already there, and batches are topped up with the neighbors of records already loaded.
+Only an LRU cache of at most cache_size records is kept in memory, plus the keys on the stack (and the keys already
+visited, for iter_dfs on graphs with cycles).
+"""
+
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import aclosing
+from functools import partial
+
+from LRUCache import LRUCache
+
+
+class NodeLoader(ABC):
+    """Interface for a store of nodes. Subclasses implement load(); one that does not cannot be created."""
+
+    @abstractmethod
+    async def load(self, keys):
+        """
+        :param keys: list of distinct keys
+        :return: dict key -> (value, list of neighbor keys); keys that do not exist are left out
+        """
+
+
+class SQLiteLoader(NodeLoader):
+    """
+    Reference loader backed by a SQLite file with the tables nodes(key, value) and edges(parent, position, child).
+    Queries run in a worker thread (asyncio.to_thread) so they do not block the event loop.
+    calls and keys_loaded count the queries made and the records returned, to check how well a walk batches.
+    """
+
+    _MAX_VARIABLES = 500  # keys per query, well below SQLite's limit on bound parameters
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.keys_loaded = 0
+
+    @classmethod
+    def save(cls, path, root):
+        """
+        Store the graph reachable from a Node root. Nodes are keyed 0, 1, 2, ... in DFS pre-order, so the root is 0.
+        :return: a loader for the new file
+        """
+        from dfs import DFS
+
+        nodes = list(DFS().iter_dfs(root))
+        keys = {id(node): key for key, node in enumerate(nodes)}
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute("DROP TABLE IF EXISTS nodes")
+            connection.execute("DROP TABLE IF EXISTS edges")
+            connection.execute("CREATE TABLE nodes (key INTEGER PRIMARY KEY, value)")
+            connection.execute("CREATE TABLE edges (parent INTEGER, position INTEGER, child INTEGER, "
+                               "PRIMARY KEY (parent, position))")
+            connection.executemany("INSERT INTO nodes VALUES (?, ?)", ((keys[id(node)], node.value) for node in nodes))
+            connection.executemany("INSERT INTO edges VALUES (?, ?, ?)",
+                                   ((keys[id(node)], position, keys[id(neighbor)])
+                                    for node in nodes
+                                    for position, neighbor in enumerate(n for n in node.neighbors if n is not None)))
+        connection.close()
+        return cls(path)
+
+    def _load(self, keys):
+        records = {}
+        with self._lock:
+            for start in range(0, len(keys), self._MAX_VARIABLES):
+                chunk = keys[start:start + self._MAX_VARIABLES]
+                marks = ",".join("?" * len(chunk))
+                for key, value in self.connection.execute(f"SELECT key, value FROM nodes WHERE key IN ({marks})", chunk):
+                    records[key] = (value, [])
+                for parent, child in self.connection.execute(
+                        f"SELECT parent, child FROM edges WHERE parent IN ({marks}) ORDER BY parent, position", chunk):
+                    records[parent][1].append(child)
+            self.calls += 1
+            self.keys_loaded += len(records)
+        return records
+
+    async def load(self, keys):
+        return await asyncio.to_thread(self._load, keys)
+
+    def close(self):
+        self.connection.close()
+
+
+class AsyncDFS:
+    """
+    The DFS traversals and aggregates for a graph behind a NodeLoader. Nodes are identified by their keys, and a
+    neighbor list holds keys, not objects.
+    :param loader: NodeLoader
+    :param cache_size: records kept in memory
+    :param batch_size: keys asked for in one load() call
+    :param prefetch: load the next batch in the background while the current node is processed
+    """
+
+    def __init__(self, loader, cache_size=10000, batch_size=64, prefetch=True):
+        if batch_size > cache_size:
+            raise ValueError(f"batch_size {batch_size} does not fit in cache_size {cache_size}")
+        self.loader = loader
+        self.cache = LRUCache(cache_size)
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+        self._loading = {}  # key -> future of the load() call that is fetching it
+        self._frontier = {}  # neighbor keys of loaded records that nobody asked for yet, oldest first
+        self._tasks = set()  # load() tasks still running
+        self._walks = 0  # walks in progress, the last one to finish cancels the loads nobody waits for any more
+
+    def _start_load(self, keys):
+        """
+        Request the keys that are neither cached nor already being loaded, in one background load() call.
+        A batch that is not full is topped up from the frontier: the neighbors of records loaded earlier, which the
+        walk has not pushed yet but will reach soon, so their records come along instead of costing a query each.
+        """
+        missing = [key for key in dict.fromkeys(keys) if key not in self.cache and key not in self._loading]
+        if not missing:
+            return
+        frontier = self._frontier
+        while len(missing) < self.batch_size and frontier:
+            key = next(iter(frontier))
+            del frontier[key]
+            if key not in self.cache and key not in self._loading and key not in missing:
+                missing.append(key)
+        task = asyncio.ensure_future(self._load(missing))
+        self._tasks.add(task)
+        task.add_done_callback(partial(self._done, missing))
+        for key in missing:
+            self._loading[key] = task
+
+    def _done(self, keys, task):
+        """
+        Forget a finished (or cancelled) load, so that its keys are loaded again if they are still missing. Its error is
+        retrieved here so that a failed prefetch nobody waited for is not reported by asyncio; a walk that does wait
+        for it still gets the error from its own await.
+        """
+        self._tasks.discard(task)
+        for key in keys:
+            self._loading.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, keys):
+        records = await self.loader.load(keys)
+        frontier = self._frontier
+        for key, record in records.items():
+            self.cache.put(key, record)
+            frontier.pop(key, None)
+        for _, neighbors in records.values():
+            for neighbor in neighbors:
+                if neighbor not in self.cache and neighbor not in self._loading:
+                    frontier[neighbor] = None
+        while len(frontier) > self.cache.capacity:  # bounded like the cache, the oldest guesses go first
+            del frontier[next(iter(frontier))]
+        return records
+
+    async def _record(self, key, upcoming):
+        """
+        :param key: the key to visit now
+        :param upcoming: the stack of keys still to visit, its end is visited next
+        :return: (value, neighbor keys) of key
+        """
+        record = self.cache.get(key)
+        if record is None:
+            if key not in self._loading:
+                self._start_load([key] + upcoming[-(self.batch_size - 1):] if self.batch_size > 1 else [key])
+            records = await self._loading[key]
+            record = records.get(key)
+            if record is None:
+                raise KeyError(key)
+        return record
+
+    def _prefetch(self, upcoming):
+        """
+        Request the next batch_size keys of the stack once the key halfway down that window is neither cached nor on
+        its way. Checking only that one key keeps this O(1) per node and makes every prefetch ask for about half a
+        batch of new keys, instead of one new key each time the window moves down by one.
+        """
+        if not upcoming:
+            return
+        probe = upcoming[-min(len(upcoming), self.batch_size // 2 + 1)]
+        if probe not in self.cache and probe not in self._loading:
+            self._start_load(upcoming[-self.batch_size:])
+
+    async def _pre_order(self, root, visited=None):
+        """
+        Async generator of (key, value, neighbor keys, depth) in the same pre-order as DFS, root at depth 0.
+        With a visited set, a key is only visited once (and its depth is that of the first path reaching it).
+        When the walk ends, finished or not, the prefetches still running are cancelled and awaited.
+        """
+        stack = [(root, 0)]
+        keys = [root]  # the keys of stack, which is what the batching looks at
+        self._walks += 1
+        try:
+            while stack:
+                key, depth = stack.pop()
+                keys.pop()
+                if visited is not None:
+                    if key in visited:
+                        continue
+                    visited.add(key)
+                value, neighbors = await self._record(key, keys)
+                for neighbor in reversed(neighbors):
+                    stack.append((neighbor, depth + 1))
+                    keys.append(neighbor)
+                if self.prefetch:
+                    self._prefetch(keys)
+                yield key, value, neighbors, depth
+        finally:
+            self._walks -= 1
+            if not self._walks and self._tasks:  # prefetches the walk ended (or failed) before reaching
+                tasks = list(self._tasks)
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def iter_dfs(self, root):
+        """Async generator of (key, value) for every key reachable from root once, like DFS.iter_dfs."""
+        async with aclosing(self._pre_order(root, set())) as walk:
+            async for key, value, _, _ in walk:
+                yield key, value
+
+    async def sum_of_nodes(self, root):
+        total = 0
+        async with aclosing(self._pre_order(root, set())) as walk:
+            async for _, value, _, _ in walk:
+                total += value
+        return total
+
+    async def max_node(self, root):
+        max_value = float('-inf')
+        async with aclosing(self._pre_order(root, set())) as walk:
+            async for _, value, _, _ in walk:
+                if value > max_value:
+                    max_value = value
+        return max_value
+
+    async def max_depth(self, root):
+        """Edges on the longest root-to-leaf path of a tree (like CompactTree.max_depth)."""
+        depth = 0
+        async with aclosing(self._pre_order(root)) as walk:
+            async for _, _, _, node_depth in walk:
+                if node_depth > depth:
+                    depth = node_depth
+        return depth
+
+    async def find_all_paths(self, root):
+        """Async generator of the root-to-leaf value paths of a tree, like DFS.iter_find_all_paths."""
+        current_path = []
+        async with aclosing(self._pre_order(root)) as walk:
+            async for _, value, neighbors, depth in walk:
+                del current_path[depth:]
+                current_path.append(value)
+                if not neighbors:
+                    yield current_path[:]
+
+    async def path_sum(self, root, target_sum):
+        """Async generator of the root-to-node value paths of a tree that sum to target_sum, like DFS.iter_path_sum."""
+        current_path = []
+        running = [0]  # running[d + 1] is the sum of the path down to depth d
+        async with aclosing(self._pre_order(root)) as walk:
+            async for _, value, _, depth in walk:
+                del current_path[depth:]
+                del running[depth + 1:]
+                current_path.append(value)
+                running.append(running[depth] + value)
+                if running[-1] == target_sum:
+                    yield current_path[:]
+
+
+if __name__ == "__main__":
+    import gc
+    import os
+    import tempfile
+
+    from Node import Node
+    from dfs import DFS
+
+    async def collect(generator):
+        return [item async for item in generator]
+
+    async def main():
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "graph.sqlite")
+        dfs = DFS()
+
+        nodes = Node.from_edges([(1, 2), (1, 3), (2, 5), (2, 4)])
+        loader = SQLiteLoader.save(path, nodes[1])
+        walk = AsyncDFS(loader, cache_size=2, batch_size=2)
+        assert [value for _, value in await collect(walk.iter_dfs(0))] == [1, 2, 5, 4, 3]
+        assert await walk.sum_of_nodes(0) == 15 and await walk.max_node(0) == 5 and await walk.max_depth(0) == 2
+        assert await collect(walk.find_all_paths(0)) == dfs.recursive_find_all_paths(nodes[1])
+        assert await collect(walk.path_sum(0, 7)) == [[1, 2, 4]]
+        assert len(walk.cache) <= 2
+        loader.close()
+
+        # Cycles are walked once, like DFS.iter_dfs
+        nodes = Node.from_edges([(0, 1), (1, 2), (2, 0), (2, 3)])
+        loader = SQLiteLoader.save(path, nodes[0])
+        assert [value for _, value in await collect(AsyncDFS(loader, 4, 2).iter_dfs(0))] == [0, 1, 2, 3]
+        loader.close()
+
+        # A wide tree: batching needs far fewer queries than one per node, and a small cache still gives the same answer
+        root = Node(0)
+        root.add_neighbors([Node(i) for i in range(1, 2001)])
+        for i, child in enumerate(root.neighbors[:100]):
+            child.add_neighbors([Node(10000 + i)])
+        loader = SQLiteLoader.save(path, root)
+        total = sum(range(2001)) + sum(range(10000, 10100))
+        assert await AsyncDFS(loader, cache_size=128, batch_size=64).sum_of_nodes(0) == total
+        # (a record loaded ahead of time can be evicted again before its turn, so a few are loaded twice)
+        assert loader.calls <= 2101 // 16 and loader.keys_loaded < 2101 * 1.25, \
+            f"Expected batched loads, but got {loader.calls} queries for {loader.keys_loaded} records"
+        loader.calls = 0
+        assert await AsyncDFS(loader, cache_size=1, batch_size=1, prefetch=False).sum_of_nodes(0) == total
+        assert loader.calls == 2101, f"Expected one query per node without batching, but got {loader.calls}"
+        loader.close()
+
+        # A walk left early cancels its prefetches instead of leaving them running
+        loader = SQLiteLoader(path)
+        walk = AsyncDFS(loader, cache_size=128, batch_size=64)
+        generator = walk.iter_dfs(0)
+        async for _ in generator:
+            break
+        await generator.aclose()
+        assert not walk._tasks and not walk._loading, f"Expected no loads left, but got {walk._tasks}"
+        loader.close()
+
+        # A prefetch that fails with nobody waiting for it is not reported as "Task exception was never retrieved"
+        class FailingLoader(NodeLoader):
+            async def load(self, keys):
+                raise OSError("connection lost")
+
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda _, context: errors.append(context))
+        walk = AsyncDFS(FailingLoader())
+        walk._start_load([1, 2])
+        while walk._tasks:
+            await asyncio.sleep(0)
+        gc.collect()
+        assert not errors and not walk._loading, f"Expected the failed load to be retrieved, but got {errors}"
+
+        loader = SQLiteLoader(path)
+        try:
+            await AsyncDFS(loader).sum_of_nodes(-1)
+            assert False, "Expected KeyError for a key that is not in the store"
+        except KeyError:
+            pass
+        loader.close()
+        os.remove(path)
+        os.rmdir(directory)
+
+        class IncompleteLoader(NodeLoader):
+            pass
+
+        try:
+            IncompleteLoader()
+            assert False, "Expected TypeError for a loader without load()"
+        except TypeError:
+            pass
+
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+"""
+Workers never see Node objects. Every tree is turned into a CompactTree first, which pickles as a handful of flat
+arrays, and CompactTree.summarize() does the work inside the worker. The parent only merges the small per-subtree
+summaries: sums and maxes add up / compare directly, and the root depths of the children are combined the same way
+DFS.analyze combines them for tilt, diameter and the universal-value path.
+"""
+
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from CompactTree import CompactTree, NO_CHILD
+from dfs import TreeAnalysis
+
+_EMPTY_BINARY = (0, 0, 0, 0, 0, 0, float('-inf'))
+_tree = None  # the CompactTree this worker process received at start-up
+
+
+def _load_tree(tree):
+    global _tree
+    _tree = tree
+
+
+def _summarize_range(bounds):
+    return _tree.summarize(*bounds)
+
+
+def _summarize_tree(tree):
+    return tree.summarize()
+
+
+def _as_compact(tree):
+    return tree if isinstance(tree, CompactTree) else CompactTree.from_node(tree)
+
+
+def _to_analysis(tree, summary):
+    return TreeAnalysis(**tree.summary_metrics(summary))
+
+
+def analyze_forest(trees, max_workers=None, chunksize=16):
+    """
+    Analyze many independent trees on a process pool.
+    :param trees: Node / BinarySearchTreeNode roots or CompactTrees (already compact trees are sent as they are)
+    :param max_workers: pool size, defaults to the number of CPUs
+    :param chunksize: trees sent to a worker per task, larger chunks cut the per-task overhead for small trees
+    :return: one TreeAnalysis per tree, in order; trees without a left/right layout only get sum, max and depth
+    """
+    trees = [_as_compact(tree) for tree in trees]
+    with ProcessPoolExecutor(max_workers) as pool:
+        summaries = pool.map(_summarize_tree, trees, chunksize=chunksize)
+        return [_to_analysis(tree, summary) for tree, summary in zip(trees, summaries)]
+
+
+def _split(tree, tasks):
+    """
+    Cut the tree into about `tasks` subtrees by repeatedly expanding the largest remaining subtree into its children.
+    Because of the pre-order numbering a child's subtree ends where its next sibling starts (the last child's ends
+    where its parent's does), so the index range of every subtree is known without walking it.
+    The number of expansions is capped so a chain-like tree does not end up being expanded node by node in the parent.
+    :return: (top, frontier): top lists the expanded node indices, frontier the (start, end) ranges to farm out
+    """
+    top = []
+    heap = [(-len(tree), 0, len(tree))]
+    while len(heap) < tasks and len(top) < 4 * tasks:
+        negative_size, start, end = heapq.heappop(heap)
+        children = list(tree.child_indices(start))
+        if not children:
+            heapq.heappush(heap, (negative_size, start, end))
+            break  # the largest subtree left is a single leaf
+        top.append(start)
+        for child, child_end in zip(children, children[1:] + [end]):
+            heapq.heappush(heap, (child - child_end, child, child_end))
+    return top, sorted((start, end) for _, start, end in heap)
+
+
+def _merge(tree, i, summaries):
+    """Combine the summaries of node i's children into the summary of node i, like one step of summarize()."""
+    value = tree.values[i]
+    if tree.left is None:
+        children = [summaries[c] for c in tree.child_indices(i)]
+        return (value + sum(child[0] for child in children),
+                max((1 + child[1] for child in children), default=0),
+                max([value] + [child[2] for child in children]))
+
+    left_child, right_child = tree.left[i], tree.right[i]
+    left = summaries[left_child] if left_child != NO_CHILD else _EMPTY_BINARY
+    right = summaries[right_child] if right_child != NO_CHILD else _EMPTY_BINARY
+    left_universal = 1 + left[2] if left_child != NO_CHILD and tree.values[left_child] == value else 0
+    right_universal = 1 + right[2] if right_child != NO_CHILD and tree.values[right_child] == value else 0
+    return (left[0] + right[0] + value,
+            1 + max(left[1], right[1]),
+            max(left_universal, right_universal),
+            left[3] + right[3] + abs(left[0] - right[0]),
+            max(left[4], right[4], left[1] + right[1]),
+            max(left[5], right[5], left_universal + right_universal),
+            max(value, left[6], right[6]))
+
+
+def analyze_parallel(tree, max_workers=None, tasks_per_worker=4):
+    """
+    Analyze one large tree by sending its top-level subtrees to a process pool and merging the results.
+    Each worker gets the whole CompactTree once, when it starts, and after that a task is just an index range.
+    :param tree: Node / BinarySearchTreeNode root or CompactTree
+    :param max_workers: pool size, defaults to the number of CPUs
+    :param tasks_per_worker: how many subtrees to cut per worker, more tasks even out uneven subtree sizes
+    :return: TreeAnalysis, same values as DFS.analyze (sum, max and depth only without a left/right layout)
+    """
+    tree = _as_compact(tree)
+    if len(tree) == 0:
+        return _to_analysis(tree, _EMPTY_BINARY if tree.left is not None else (0, 0, float('-inf')))
+    max_workers = max_workers or os.cpu_count() or 1
+    top, frontier = _split(tree, max_workers * tasks_per_worker)
+    with ProcessPoolExecutor(max_workers, initializer=_load_tree, initargs=(tree,)) as pool:
+        summaries = dict(zip((start for start, _ in frontier), pool.map(_summarize_range, frontier)))
+    for start in sorted(top, reverse=True):  # children have larger indices than their parents
+        summaries[start] = _merge(tree, start, summaries)
+    return _to_analysis(tree, summaries[0])
+
+
+if __name__ == "__main__":
+    from Node import Node
+    from dfs import DFS
+    from benchmarks import balanced_bst
+
+    dfs = DFS()
+    roots = [balanced_bst(n) for n in (1, 2, 7, 100)]
+    assert analyze_forest(roots, max_workers=2) == [dfs.analyze(root) for root in roots]
+
+    root = balanced_bst(1000)
+    for workers in (1, 3):
+        analysis = analyze_parallel(root, max_workers=workers)
+        assert analysis == dfs.analyze(root), f"Expected {dfs.analyze(root)}, but got {analysis}"
+
+    nodes = Node.from_edges([(1, 2), (1, 3), (2, 4), (2, 5), (3, 6), (6, 7)])
+    analysis = analyze_parallel(nodes[1], max_workers=2)
+    assert analysis == TreeAnalysis(sum=28, max=7, depth=3), f"Expected sum 28, max 7, depth 3, but got {analysis}"
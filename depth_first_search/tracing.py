@@ -0,0 +1,137 @@
+"""
+Hooks for watching a DFS method work. Pass a tracer to DFS(tracer=...) and every method reports to it:
+
+    start(name) / finish(name)  a public method was called / returned (nested calls report too)
+    enter(node, stack_size)     a node is visited; stack_size is the length of the explicit stack at that moment
+    exit(node)                  the walk backtracks out of node, i.e. where a recursive version would return from it
+    prune(node)                 the walk refuses to go into node (already visited, repeated value, BST order broken)
+
+Methods that keep no path (iter_dfs, sum and max of nodes) never backtrack and only report enter / prune. Methods
+that are answered from a CompactTree's arrays, a CachedBinarySearchTreeNode's cache or a FrozenNode's subtree_metric
+touch no nodes, so they only report start / finish.
+Without a tracer every method checks `tracer is not None` once per node and does nothing else.
+"""
+
+import time
+from functools import wraps
+from inspect import isgeneratorfunction
+
+
+class Tracer:
+    """Base class with every hook doing nothing, so a subclass only overrides the events it cares about."""
+
+    def start(self, name):
+        pass
+
+    def finish(self, name):
+        pass
+
+    def enter(self, node, stack_size):
+        pass
+
+    def exit(self, node):
+        pass
+
+    def prune(self, node):
+        pass
+
+
+class TraversalStats(Tracer):
+    """
+    Counts what the traced calls did: nodes visited, the largest explicit stack, backtracks, prunes, and the wall time
+    of the outermost calls (a method called by another traced method is not timed twice).
+    The counters add up over all calls until reset().
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._started = 0.0
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.nodes_visited = 0
+        self.max_stack_depth = 0
+        self.backtracks = 0
+        self.prunes = 0
+        self.wall_time = 0.0
+
+    def start(self, name):
+        if self._depth == 0:
+            self.calls += 1
+            self._started = time.perf_counter()
+        self._depth += 1
+
+    def finish(self, name):
+        self._depth -= 1
+        if self._depth == 0:
+            self.wall_time += time.perf_counter() - self._started
+
+    def enter(self, node, stack_size):
+        self.nodes_visited += 1
+        if stack_size > self.max_stack_depth:
+            self.max_stack_depth = stack_size
+
+    def exit(self, node):
+        self.backtracks += 1
+
+    def prune(self, node):
+        self.prunes += 1
+
+    def __repr__(self):
+        return (f"TraversalStats(calls={self.calls}, nodes_visited={self.nodes_visited}, "
+                f"max_stack_depth={self.max_stack_depth}, backtracks={self.backtracks}, prunes={self.prunes}, "
+                f"wall_time={self.wall_time:.6f})")
+
+
+def traced(method):
+    """
+    Report start / finish of a DFS method to self.tracer. Without a tracer the method is called straight away.
+    A generator method is timed from its first item until it is exhausted or closed, including the caller's time
+    in between.
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def call(self, *args, **kwargs):
+        tracer = self.tracer
+        if tracer is None:
+            return method(self, *args, **kwargs)
+        tracer.start(name)
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            tracer.finish(name)
+
+    @wraps(method)
+    def call_generator(self, *args, **kwargs):
+        tracer = self.tracer
+        if tracer is None:
+            return method(self, *args, **kwargs)
+        return _traced_generator(tracer, name, method(self, *args, **kwargs))
+
+    return call_generator if isgeneratorfunction(method) else call
+
+
+def _traced_generator(tracer, name, generator):
+    tracer.start(name)
+    try:
+        yield from generator
+    finally:
+        tracer.finish(name)
+
+
+def backtrack(tracer, trail, depth):
+    """
+    Report exit for every node on trail deeper than depth and drop them from it.
+    trail holds the nodes of the current root-to-node path, for the loops that otherwise only remember values.
+    """
+    while len(trail) > depth:
+        tracer.exit(trail.pop())
+
+
+def descend(tracer, trail, depth, node, stack_size):
+    """Report the backtracking up to depth, then entering node at depth."""
+    backtrack(tracer, trail, depth)
+    trail.append(node)
+    tracer.enter(node, stack_size)